@@ -3,75 +3,269 @@ API routes for Whisp geospatial analysis
 """
 import sys
 import json
+import math
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Any, List, Optional, Tuple, Union
+import orjson
+import msgspec
 import pandas as pd
 import ee
+from pydantic import ValidationError
 
-# Add parent directory to path to import whisp modules
-whisp_root = Path(__file__).parent.parent.parent.parent
-sys.path.insert(0, str(whisp_root))
+# Add the package source directory to path to import whisp modules (once)
+WHISP_SRC_DIR = str(Path(__file__).resolve().parents[3] / "src")
+if WHISP_SRC_DIR not in sys.path:
+    sys.path.insert(0, WHISP_SRC_DIR)
 
 from app.models.schemas import (
     AnalyzeRequest,
     AnalyzeResponse,
+    AnalyzeResponseFast,
     HealthResponse,
     ErrorResponse
 )
 from app.core.config import settings
+from app.core.cache import make_cache_key, get_cached_result, set_cached_result
 
 # Import Whisp modules
 try:
-    from modules.stats import get_stats
-    from modules.risk import whisp_risk
-    from modules.utils import collection_properties_to_df
-    import geemap
+    from openforis_whisp.datasets import combine_datasets
+    from openforis_whisp.stats import get_stats
+    from openforis_whisp.risk import whisp_risk
 except ImportError as e:
-    print(f"Warning: Could not import Whisp modules: {e}")
-    print("Make sure the API is run from the correct directory with access to Whisp modules")
+    raise ImportError(
+        f"Could not import Whisp modules: {e}. Install the API requirements "
+        "(they include the openforis_whisp runtime dependencies) and run the "
+        "API from the repository so the Whisp sources are importable"
+    ) from e
 
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows serialized per streamed NDJSON chunk
+NDJSON_CHUNK_ROWS = 100
 
-def initialize_gee():
-    """Initialize Google Earth Engine"""
+# Columns that are kept as-is when coercing stats output to numeric
+EXCLUDED_COLS = frozenset({
+    "Plot_ID", "Geometry_type", "Country", "Admin_Level_1",
+    "In_waterbody", "Unit", "geoid", "system:index", "id", "name"
+})
+
+# Dedicated pool for blocking GEE/pandas work, kept separate from the default
+# thread pool Starlette uses for its own sync internals
+_analysis_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_analysis_executor() -> ThreadPoolExecutor:
+    """Return the analysis thread pool, creating it on first use"""
+    global _analysis_executor
+    if _analysis_executor is None:
+        _analysis_executor = ThreadPoolExecutor(
+            max_workers=settings.MAX_ANALYSIS_WORKERS,
+            thread_name_prefix="whisp-analysis"
+        )
+    return _analysis_executor
+
+
+def shutdown_analysis_executor():
+    """Shut down the analysis thread pool (called on application shutdown)"""
+    global _analysis_executor
+    if _analysis_executor is not None:
+        _analysis_executor.shutdown(wait=False)
+        _analysis_executor = None
+
+
+# GEE is initialized once per process; later calls only check the flag
+_gee_ready: bool = False
+_gee_lock = threading.Lock()
+
+
+def initialize_gee() -> bool:
+    """Initialize Google Earth Engine (cached after the first success)"""
+    global _gee_ready
+    if _gee_ready:
+        return True
+    with _gee_lock:
+        if _gee_ready:
+            return True
+        try:
+            # Try to initialize with project if specified
+            if settings.GEE_PROJECT:
+                ee.Initialize(project=settings.GEE_PROJECT)
+            else:
+                ee.Initialize()
+            _gee_ready = True
+        except Exception as e:
+            print(f"Failed to initialize GEE: {e}")
+    return _gee_ready
+
+
+def warm_up_gee() -> bool:
+    """Make a trivial GEE request so the first real request doesn't pay for connection setup"""
     try:
-        # Try to initialize with project if specified
-        if settings.GEE_PROJECT:
-            ee.Initialize(project=settings.GEE_PROJECT)
-        else:
-            ee.Initialize()
+        ee.Number(1).getInfo()
         return True
     except Exception as e:
-        print(f"Failed to initialize GEE: {e}")
+        print(f"GEE warm-up request failed: {e}")
         return False
 
 
-def geojson_to_ee(geojson_str: str) -> ee.FeatureCollection:
-    """Convert GeoJSON string to Earth Engine FeatureCollection"""
-    try:
-        geojson_dict = json.loads(geojson_str) if isinstance(geojson_str, str) else geojson_str
-        return ee.FeatureCollection(geojson_dict)
-    except Exception as e:
-        raise ValueError(f"Failed to parse GeoJSON: {str(e)}")
+def is_gee_ready() -> bool:
+    """Return whether GEE has been initialized, without attempting to initialize it"""
+    return _gee_ready
 
 
-def fc_to_dataframe(fc: ee.FeatureCollection, num_features: int) -> pd.DataFrame:
-    """Convert FeatureCollection to pandas DataFrame"""
+def parse_geojson(geojson_str: Union[str, bytes, Dict[str, Any]]) -> Dict[str, Any]:
+    """Parse a GeoJSON string (or raw bytes) into a dict; GeoJSON sent as an object is returned as is"""
+    if not isinstance(geojson_str, (str, bytes)):
+        return geojson_str
     try:
-        if num_features <= 500:
-            # For small datasets, use geemap for faster conversion
-            df = geemap.ee_to_pandas(fc)
-        else:
-            # For large datasets, use custom function
-            df = collection_properties_to_df(fc)
-        return df
-    except Exception as e:
+        # orjson parses bytes directly, skipping the utf-8 decode
+        return orjson.loads(geojson_str)
+    except orjson.JSONDecodeError:
+        # Fall back to stdlib json, which also accepts NaN/Infinity literals
+        return json.loads(geojson_str)
+
+
+def count_geojson_features(geojson_dict: Dict[str, Any]) -> int:
+    """Count the features in a parsed GeoJSON object without asking GEE"""
+    if not isinstance(geojson_dict, dict):
+        raise ValueError("GeoJSON must be an object")
+    if geojson_dict.get("type") == "FeatureCollection":
+        return len(geojson_dict.get("features") or [])
+    return 1
+
+
+def _property_columns(fc: ee.FeatureCollection) -> ee.Dictionary:
+    """Server-side dictionary of property name -> list of values for a FeatureCollection"""
+    # Union of names across all features; the first one may lack optional properties
+    prop_names = ee.List(
+        fc.map(lambda f: ee.Feature(None, {"names": f.propertyNames()}))
+        .aggregate_array("names")
+    ).flatten().distinct()
+    columns = fc.reduceColumns(
+        ee.Reducer.toList().repeat(prop_names.size()), prop_names
+    ).get("list")
+    return ee.Dictionary.fromLists(prop_names, columns)
+
+
+def _columns_to_dataframe(
+    data: Dict[str, list],
+    num_features: int,
+    fc: ee.FeatureCollection
+) -> pd.DataFrame:
+    """Build a DataFrame from fetched property columns"""
+    # ee.Reducer.toList() skips nulls, so a column shorter than the collection
+    # can't be aligned by row (even when every column is equally short)
+    if any(len(values) != num_features for values in data.values()):
+        return ee.data.computeFeatures({
+            "expression": fc,
+            "fileFormat": "PANDAS_DATAFRAME"
+        })
+    return pd.DataFrame(data)
+
+
+def fc_to_dataframe(fc: ee.FeatureCollection) -> pd.DataFrame:
+    """Convert FeatureCollection to pandas DataFrame in a single getInfo call"""
+    try:
+        num_features, data = ee.List([fc.size(), _property_columns(fc)]).getInfo()
+        return _columns_to_dataframe(data, num_features, fc)
+    except ee.EEException as e:
         raise ValueError(f"Failed to convert FeatureCollection to DataFrame: {str(e)}")
 
 
+def fetch_count_and_stats(
+    fc: ee.FeatureCollection,
+    unit_type: str,
+    whisp_image: ee.Image
+) -> Tuple[int, Optional[pd.DataFrame]]:
+    """
+    Fetch the feature count of a collection in the same getInfo call as its
+    stats. Stats are only computed (and returned) for non-empty collections
+    small enough to run in one piece (up to BATCH_THRESHOLD features); for
+    larger ones the DataFrame is None and run_stats() should be used.
+    """
+    size = fc.size()
+    stats_fc = get_stats(fc, unit_type=unit_type, whisp_image=whisp_image)
+    run_now = size.gt(0).And(size.lte(settings.BATCH_THRESHOLD))
+    num_features, data = ee.List([
+        size,
+        ee.Algorithms.If(run_now, _property_columns(stats_fc), None)
+    ]).getInfo()
+    if data is None:
+        return num_features, None
+    return num_features, _columns_to_dataframe(data, num_features, stats_fc)
+
+
+def _stats_to_dataframe(
+    fc: ee.FeatureCollection,
+    unit_type: str,
+    whisp_image: ee.Image
+) -> pd.DataFrame:
+    """Run Whisp stats on a FeatureCollection and fetch the result as a DataFrame"""
+    return fc_to_dataframe(get_stats(fc, unit_type=unit_type, whisp_image=whisp_image))
+
+
+def _split_collection(
+    fc: ee.FeatureCollection,
+    num_features: int,
+    chunk_size: int,
+    geojson_features: Optional[List[Dict[str, Any]]] = None
+) -> List[ee.FeatureCollection]:
+    """
+    Split a collection into consecutive chunks of at most chunk_size features.
+    Inline GeoJSON is split on the client, so each chunk only uploads its own
+    geometries; assets are sliced server side.
+    """
+    if geojson_features is not None:
+        return [
+            ee.FeatureCollection({
+                "type": "FeatureCollection",
+                "features": geojson_features[start:start + chunk_size]
+            })
+            for start in range(0, num_features, chunk_size)
+        ]
+    features = fc.toList(num_features)
+    return [
+        ee.FeatureCollection(features.slice(start, start + chunk_size))
+        for start in range(0, num_features, chunk_size)
+    ]
+
+
+def run_stats(
+    fc: ee.FeatureCollection,
+    num_features: int,
+    unit_type: str,
+    whisp_image: ee.Image,
+    geojson_features: Optional[List[Dict[str, Any]]] = None
+) -> pd.DataFrame:
+    """
+    Run Whisp stats, splitting collections above BATCH_THRESHOLD into
+    N_WORKERS chunks that are computed concurrently by GEE. Pass the
+    features of inline GeoJSON input as geojson_features so the chunks
+    are built from them rather than from fc.
+    """
+    if num_features <= settings.BATCH_THRESHOLD:
+        return _stats_to_dataframe(fc, unit_type, whisp_image)
+
+    chunk_size = math.ceil(num_features / settings.N_WORKERS)
+    chunks = _split_collection(fc, num_features, chunk_size, geojson_features)
+
+    # Already on an analysis worker thread, so use a separate pool for the chunks
+    with ThreadPoolExecutor(max_workers=settings.N_WORKERS) as pool:
+        dfs = list(pool.map(
+            lambda chunk: _stats_to_dataframe(chunk, unit_type, whisp_image), chunks
+        ))
+    return pd.concat(dfs, ignore_index=True)
+
+
 @router.get(
     "/health",
     response_model=HealthResponse,
@@ -80,7 +274,7 @@ def fc_to_dataframe(fc: ee.FeatureCollection, num_features: int) -> pd.DataFrame
 )
 async def health_check() -> HealthResponse:
     """Health check endpoint"""
-    gee_status = initialize_gee()
+    gee_status = is_gee_ready()
 
     return HealthResponse(
         status="healthy" if gee_status else "degraded",
@@ -89,17 +283,65 @@ async def health_check() -> HealthResponse:
     )
 
 
+def _inline_schema_refs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve local $defs references so a model schema can be embedded in openapi_extra"""
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref and ref.startswith("#/$defs/"):
+                return resolve(defs[ref.split("/")[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return resolve(schema)
+
+
+def encode_analyze_response(
+    status: str,
+    num_features: int,
+    output_unit: str,
+    risk_calculated: bool,
+    results_json: bytes,
+    message: str = None
+) -> bytes:
+    """Encode the /analyze response body, embedding the pre-serialized results as-is"""
+    return msgspec.json.encode(AnalyzeResponseFast(
+        status=status,
+        num_features=num_features,
+        output_unit=output_unit,
+        risk_calculated=risk_calculated,
+        results=msgspec.Raw(results_json),
+        message=message
+    ))
+
+
 @router.post(
     "/analyze",
-    response_model=AnalyzeResponse,
+    response_model=None,
+    response_class=Response,
     summary="Analyze plots",
     description="Run geospatial analysis on plots using Google Earth Engine datasets",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": _inline_schema_refs(AnalyzeRequest.model_json_schema())
+                }
+            }
+        }
+    },
     responses={
+        200: {"model": AnalyzeResponse, "description": "Analysis results"},
         400: {"model": ErrorResponse, "description": "Bad request"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     }
 )
-async def analyze_plots(request: AnalyzeRequest) -> AnalyzeResponse:
+async def analyze_plots(http_request: Request) -> Response:
     """
     Analyze plots for forest and deforestation risk.
 
@@ -108,132 +350,182 @@ async def analyze_plots(request: AnalyzeRequest) -> AnalyzeResponse:
     2. Runs zonal statistics across 150+ Earth observation datasets
     3. Optionally calculates EUDR risk indicators and classification
     4. Returns results as structured JSON
-    """
 
+    The results are serialized straight from the DataFrame and embedded in
+    a msgspec-encoded envelope, skipping the intermediate list of dicts and
+    Pydantic re-validation of the (potentially very large) results.
+    The blocking GEE and pandas work runs on a dedicated thread pool so the
+    event loop stays free to serve other requests in the meantime.
+    The request body is validated directly from the raw bytes by pydantic-core.
+
+    Clients sending `Accept: application/x-ndjson` get the results streamed as
+    one JSON object per line, with the envelope fields in X-* headers.
+    """
     try:
-        # Initialize GEE
-        if not initialize_gee():
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to initialize Google Earth Engine. Check authentication."
-            )
+        request = AnalyzeRequest.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
 
-        # Parse input based on type
-        if request.input_type == "gee_asset":
-            try:
-                feature_collection = ee.FeatureCollection(request.input_data)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to load GEE asset: {str(e)}"
-                )
-        elif request.input_type == "geojson":
-            try:
-                feature_collection = geojson_to_ee(request.input_data)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to parse GeoJSON: {str(e)}"
-                )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid input_type: {request.input_type}"
-            )
+    stream_ndjson = NDJSON_MEDIA_TYPE in http_request.headers.get("accept", "")
 
-        # Get number of features
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_analysis_executor(), _run_analysis, request, stream_ndjson
+    )
+
+
+def _json_response(body: bytes) -> Response:
+    """Wrap an already-encoded JSON body in a response"""
+    return Response(content=body, media_type="application/json")
+
+
+def _iter_ndjson(df: pd.DataFrame):
+    """Yield the DataFrame as NDJSON, serializing NDJSON_CHUNK_ROWS rows at a time"""
+    for start in range(0, len(df), NDJSON_CHUNK_ROWS):
+        lines = df.iloc[start:start + NDJSON_CHUNK_ROWS].to_json(
+            orient="records", lines=True, double_precision=settings.RESULT_DOUBLE_PRECISION
+        )
+        if not lines.endswith("\n"):
+            lines += "\n"
+        yield lines.encode()
+
+
+def _run_analysis(request: AnalyzeRequest, stream_ndjson: bool = False) -> Response:
+    """Run the blocking part of /analyze (GEE calls, stats, risk, serialization)"""
+    # Identical requests (same input, unit, risk flag and thresholds) are served from cache.
+    # Streamed responses are never assembled into a full body, so they bypass the cache.
+    cache_key = make_cache_key(request.model_dump(mode="json"))
+    if not stream_ndjson:
+        cached_body = get_cached_result(cache_key)
+        if cached_body is not None:
+            return _json_response(cached_body)
+
+    # GEE is initialized on startup; this is a flag check unless startup init failed
+    if not initialize_gee():
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to initialize Google Earth Engine. Check authentication."
+        )
+
+    # Build the combined Whisp image once; every stats call below reuses it
+    whisp_image = combine_datasets()
+
+    # Parse input based on type and get the number of features. GeoJSON
+    # features are counted locally; for assets the count comes back with
+    # the stats of small collections in a single round-trip.
+    df = None
+    geojson_features = None
+    if request.input_type == "gee_asset":
         try:
-            num_features = feature_collection.size().getInfo()
-        except Exception as e:
+            if not isinstance(request.input_data, str):
+                raise ValueError("input_data must be the asset path as a string")
+            feature_collection = ee.FeatureCollection(request.input_data)
+            num_features, df = fetch_count_and_stats(
+                feature_collection, request.output_unit.value, whisp_image
+            )
+        except (ee.EEException, ValueError) as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to get feature count: {str(e)}"
+                detail=f"Failed to load GEE asset: {str(e)}"
             )
-
-        if num_features == 0:
+    elif request.input_type == "geojson":
+        try:
+            geojson_dict = parse_geojson(request.input_data)
+            num_features = count_geojson_features(geojson_dict)
+            feature_collection = ee.FeatureCollection(geojson_dict)
+            if geojson_dict.get("type") == "FeatureCollection":
+                geojson_features = geojson_dict.get("features")
+        except (ee.EEException, ValueError, TypeError) as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Input contains no features"
-            )
-
-        # Check if dataset is too large
-        if num_features > settings.WHISP_THRESHOLD_TO_DRIVE:
-            return AnalyzeResponse(
-                status="too_large",
-                num_features=num_features,
-                output_unit=request.output_unit.value,
-                risk_calculated=False,
-                results=[],
-                message=f"Dataset has {num_features} features, which exceeds the limit of {settings.WHISP_THRESHOLD_TO_DRIVE}. "
-                        f"Please use the Google Drive export workflow or reduce the number of features."
+                detail=f"Failed to parse GeoJSON: {str(e)}"
             )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid input_type: {request.input_type}"
+        )
 
-        # Run Whisp analysis
-        try:
-            # Temporarily set the output unit in config
-            import parameters.config_runtime as config
-            original_unit = config.percent_or_ha
-            config.percent_or_ha = request.output_unit.value
+    if num_features == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Input contains no features"
+        )
 
-            # Run stats
-            stats_fc = get_stats(feature_collection)
+    # Check if dataset is too large
+    if num_features > settings.WHISP_THRESHOLD_TO_DRIVE:
+        return _json_response(encode_analyze_response(
+            status="too_large",
+            num_features=num_features,
+            output_unit=request.output_unit.value,
+            risk_calculated=False,
+            results_json=b"[]",
+            message=f"Dataset has {num_features} features, which exceeds the limit of {settings.WHISP_THRESHOLD_TO_DRIVE}. "
+                    f"Please use the Google Drive export workflow or reduce the number of features."
+        ))
 
-            # Convert to DataFrame
-            df = fc_to_dataframe(stats_fc, num_features)
+    # Run Whisp analysis
+    try:
+        # Run stats and convert to DataFrame (in parallel chunks for large inputs)
+        if df is None:
+            df = run_stats(
+                feature_collection, num_features, request.output_unit.value,
+                whisp_image, geojson_features
+            )
 
-            # Convert numeric columns from strings to floats
-            for col in df.columns:
-                if col not in ['Plot_ID', 'Geometry_type', 'Country', 'Admin_Level_1',
-                               'In_waterbody', 'Unit', 'geoid', 'system:index', 'id', 'name']:
-                    try:
-                        df[col] = pd.to_numeric(df[col], errors='ignore')
-                    except:
-                        pass
+        # Convert numeric columns from strings to floats
+        num_cols = [col for col in df.columns if col not in EXCLUDED_COLS]
+        df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="ignore")
 
-            # Restore original unit
-            config.percent_or_ha = original_unit
+    except (ee.EEException, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run analysis: {str(e)}"
+        )
 
-        except Exception as e:
+    # Calculate risk if requested
+    if request.calculate_risk:
+        try:
+            df = whisp_risk(
+                df,
+                ind_1_pcent_threshold=request.ind_1_threshold,
+                ind_2_pcent_threshold=request.ind_2_threshold,
+                ind_3_pcent_threshold=request.ind_3_threshold,
+                ind_4_pcent_threshold=request.ind_4_threshold
+            )
+        except (KeyError, TypeError, ValueError) as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to run analysis: {str(e)}"
+                detail=f"Failed to calculate risk: {str(e)}"
             )
 
-        # Calculate risk if requested
-        if request.calculate_risk:
-            try:
-                df = whisp_risk(
-                    df,
-                    ind_1_pcent_threshold=request.ind_1_threshold,
-                    ind_2_pcent_threshold=request.ind_2_threshold,
-                    ind_3_pcent_threshold=request.ind_3_threshold,
-                    ind_4_pcent_threshold=request.ind_4_threshold
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to calculate risk: {str(e)}"
-                )
-
-        # Convert DataFrame to list of dicts for JSON response
-        results = df.to_dict(orient="records")
-
-        return AnalyzeResponse(
-            status="success",
-            num_features=num_features,
-            output_unit=request.output_unit.value,
-            risk_calculated=request.calculate_risk,
-            results=results,
-            message=f"Successfully analyzed {num_features} features"
+    if stream_ndjson:
+        return StreamingResponse(
+            _iter_ndjson(df),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={
+                "X-Num-Features": str(num_features),
+                "X-Output-Unit": request.output_unit.value,
+                "X-Risk-Calculated": str(request.calculate_risk).lower()
+            }
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unexpected error: {str(e)}"
-        )
+    # Serialize the DataFrame directly and embed it in the envelope as-is
+    results_json = df.to_json(
+        orient="records", double_precision=settings.RESULT_DOUBLE_PRECISION
+    ).encode()
+
+    body = encode_analyze_response(
+        status="success",
+        num_features=num_features,
+        output_unit=request.output_unit.value,
+        risk_calculated=request.calculate_risk,
+        results_json=results_json,
+        message=f"Successfully analyzed {num_features} features"
+    )
+    set_cached_result(cache_key, body)
+
+    return _json_response(body)
 
 
 @router.get(
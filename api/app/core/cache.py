@@ -0,0 +1,51 @@
+"""
+On-disk cache for /analyze results
+"""
+import hashlib
+from typing import Any, Dict, Optional
+
+import diskcache
+import orjson
+
+from app.core.config import settings
+
+
+_cache: Optional[diskcache.Cache] = None
+
+
+def get_cache() -> diskcache.Cache:
+    """Return the results cache, opening it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = diskcache.Cache(str(settings.WHISP_OUTPUT_DIR / "cache"))
+    return _cache
+
+
+def close_cache():
+    """Close the results cache (called on application shutdown)"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def make_cache_key(request_params: Dict[str, Any]) -> str:
+    """Hash the request parameters (input data, unit, risk flag, thresholds) into a cache key"""
+    return hashlib.blake2b(
+        orjson.dumps(request_params, option=orjson.OPT_SORT_KEYS),
+        digest_size=32
+    ).hexdigest()
+
+
+def get_cached_result(key: str) -> Optional[bytes]:
+    """Return the cached JSON response body for a key, or None on a miss"""
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    return get_cache().get(key)
+
+
+def set_cached_result(key: str, body: bytes):
+    """Store a JSON response body under a key"""
+    if not settings.RESULT_CACHE_ENABLED:
+        return
+    get_cache().set(key, body, expire=settings.RESULT_CACHE_TTL)
@@ -2,8 +2,9 @@
 Configuration settings for the Whisp API
 """
 import os
+from functools import lru_cache
 from pathlib import Path
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 
@@ -19,6 +20,9 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     RELOAD: bool = True
+    WORKERS: Optional[int] = None  # defaults to the CPU count when RELOAD is off
+    ACCESS_LOG: bool = False
+    MAX_ANALYSIS_WORKERS: int = 4
 
     # Google Earth Engine
     GEE_PROJECT: Optional[str] = None
@@ -30,6 +34,17 @@ class Settings(BaseSettings):
     WHISP_OUTPUT_DIR: Path = WHISP_ROOT / "results"
     WHISP_THRESHOLD_TO_DRIVE: int = 500
 
+    # Inputs above BATCH_THRESHOLD features are processed in N_WORKERS parallel chunks
+    BATCH_THRESHOLD: int = 100
+    N_WORKERS: int = 4
+
+    # Decimal places kept for floats in /analyze results (4 = 1 m² for hectares)
+    RESULT_DOUBLE_PRECISION: int = 4
+
+    # Result cache (stored under WHISP_OUTPUT_DIR/cache)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL: int = 86400  # seconds
+
     # EUDR risk thresholds
     DEFAULT_IND_1_THRESHOLD: float = 10.0
     DEFAULT_IND_2_THRESHOLD: float = 10.0
@@ -42,14 +57,25 @@ class Settings(BaseSettings):
     ALLOW_METHODS: list = ["*"]
     ALLOW_HEADERS: list = ["*"]
 
+    # Response compression (gzip)
+    GZIP_MINIMUM_SIZE: int = 1024  # bytes
+    GZIP_COMPRESSLEVEL: int = 5
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-        extra = "ignore"  # Ignore extra fields from parent .env
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        extra="ignore"  # Ignore extra fields from parent .env
+    )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, reading the environment only once"""
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -0,0 +1,127 @@
+"""
+ASGI middleware for the Whisp API
+"""
+from typing import Sequence
+
+ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+SAFELISTED_HEADERS = {"accept", "accept-language", "content-language", "content-type"}
+
+
+class FastCORS:
+    """
+    CORS middleware for the wildcard-origin case (ALLOW_ORIGINS = ["*"]).
+
+    Behaves like Starlette's CORSMiddleware with allow_origins=["*"], but all
+    response headers are precomputed as raw bytes and no per-request origin
+    matching is done. Requests without an Origin header pass straight through.
+    """
+
+    def __init__(
+        self,
+        app,
+        allow_credentials: bool = False,
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        max_age: int = 600
+    ):
+        self.app = app
+        self.allow_credentials = allow_credentials
+        self.allow_methods = set(ALL_METHODS if "*" in allow_methods else allow_methods)
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_headers = SAFELISTED_HEADERS | {h.lower() for h in allow_headers}
+
+        # Headers added to every non-preflight CORS response (besides the origin)
+        self.simple_headers = []
+        if allow_credentials:
+            self.simple_headers.append((b"access-control-allow-credentials", b"true"))
+
+        # Static part of preflight responses
+        self.preflight_headers = [
+            (b"access-control-allow-methods", ", ".join(sorted(self.allow_methods)).encode()),
+            (b"access-control-max-age", str(max_age).encode())
+        ]
+        if allow_credentials:
+            self.preflight_headers.append((b"access-control-allow-credentials", b"true"))
+        else:
+            self.preflight_headers.append((b"access-control-allow-origin", b"*"))
+        if not self.allow_all_headers:
+            self.preflight_headers.append(
+                (b"access-control-allow-headers", ", ".join(sorted(self.allow_headers)).encode())
+            )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        has_cookie = False
+        requested_method = None
+        requested_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"cookie":
+                has_cookie = True
+            elif name == b"access-control-request-method":
+                requested_method = value
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and requested_method is not None:
+            await self.preflight_response(send, origin, requested_method, requested_headers)
+            return
+
+        await self.app(scope, receive, self.wrap_send(send, origin, has_cookie))
+
+    async def preflight_response(self, send, origin: bytes, requested_method: bytes, requested_headers):
+        """Answer a CORS preflight request directly"""
+        headers = list(self.preflight_headers)
+        if self.allow_credentials:
+            # "*" is not valid together with credentials, so echo the origin
+            headers.append((b"access-control-allow-origin", origin))
+            headers.append((b"vary", b"Origin"))
+
+        failures = []
+        if requested_method.decode("latin-1") not in self.allow_methods:
+            failures.append("method")
+        if requested_headers is not None:
+            if self.allow_all_headers:
+                headers.append((b"access-control-allow-headers", requested_headers))
+            else:
+                for header in requested_headers.decode("latin-1").split(","):
+                    if header.strip().lower() not in self.allow_headers:
+                        failures.append("headers")
+                        break
+
+        if failures:
+            status_code = 400
+            body = f"Disallowed CORS {', '.join(failures)}".encode()
+        else:
+            status_code = 200
+            body = b"OK"
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    def wrap_send(self, send, origin: bytes, has_cookie: bool):
+        """Return a send callable that adds the CORS headers to the response start"""
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.extend(self.simple_headers)
+                if self.allow_credentials and has_cookie:
+                    # Credentialed responses must name the origin instead of "*"
+                    headers.append((b"access-control-allow-origin", origin))
+                    headers.append((b"vary", b"Origin"))
+                else:
+                    headers.append((b"access-control-allow-origin", b"*"))
+                message["headers"] = headers
+            await send(message)
+
+        return send_with_cors
@@ -3,10 +3,13 @@ Main FastAPI application for Whisp geospatial analysis
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 import logging
 
 from app.core.config import settings
+from app.core.cache import close_cache
+from app.core.middleware import FastCORS
 from app.api import routes
 
 # Configure logging
@@ -23,16 +26,32 @@ app = FastAPI(
     description=settings.API_DESCRIPTION,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
+# Add CORS middleware (a lighter implementation when any origin is allowed)
+if settings.ALLOW_ORIGINS == ["*"]:
+    app.add_middleware(
+        FastCORS,
+        allow_credentials=settings.ALLOW_CREDENTIALS,
+        allow_methods=settings.ALLOW_METHODS,
+        allow_headers=settings.ALLOW_HEADERS,
+    )
+else:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.ALLOW_ORIGINS,
+        allow_credentials=settings.ALLOW_CREDENTIALS,
+        allow_methods=settings.ALLOW_METHODS,
+        allow_headers=settings.ALLOW_HEADERS,
+    )
+
+# Compress large responses (the /analyze JSON compresses very well)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOW_ORIGINS,
-    allow_credentials=settings.ALLOW_CREDENTIALS,
-    allow_methods=settings.ALLOW_METHODS,
-    allow_headers=settings.ALLOW_HEADERS,
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESSLEVEL,
 )
 
 # Include routers
@@ -62,19 +81,41 @@ async def startup_event():
     settings.WHISP_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     logger.info("Output directory created/verified")
 
+    # Initialize GEE once per process; requests reuse the session
+    if routes.initialize_gee():
+        logger.info("Google Earth Engine initialized")
+        if routes.warm_up_gee():
+            logger.info("Google Earth Engine connection warmed up")
+    else:
+        logger.warning("Google Earth Engine initialization failed; will retry on first request")
+
+    # Create the thread pool used for blocking analysis work
+    routes.get_analysis_executor()
+    logger.info(f"Analysis thread pool ready ({settings.MAX_ANALYSIS_WORKERS} workers)")
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info(f"Shutting down {settings.API_TITLE}")
+    routes.shutdown_analysis_executor()
+    close_cache()
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
+
+    # Auto-reload only supports a single worker, so use it in development only
+    workers = 1 if settings.RELOAD else (settings.WORKERS or os.cpu_count() or 1)
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.RELOAD,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        access_log=settings.ACCESS_LOG,
         log_level=settings.LOG_LEVEL.lower()
     )
@@ -1,9 +1,10 @@
 """
 Pydantic models for request and response validation
 """
-from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Dict, Any, List, Union
 from enum import Enum
+import msgspec
 
 
 class InputType(str, Enum):
@@ -31,9 +32,9 @@ class AnalyzeRequest(BaseModel):
         ...,
         description="Type of input: 'gee_asset' for Earth Engine asset path, or 'geojson' for GeoJSON"
     )
-    input_data: str = Field(
+    input_data: Union[str, Dict[str, Any]] = Field(
         ...,
-        description="GEE asset path (e.g., 'projects/ee-whisp/assets/example') or GeoJSON string"
+        description="GEE asset path (e.g., 'projects/ee-whisp/assets/example'), or GeoJSON as an object or a string"
     )
     output_unit: OutputUnit = Field(
         default=OutputUnit.HECTARES,
@@ -68,8 +69,8 @@ class AnalyzeRequest(BaseModel):
         description="Threshold for Indicator 4 (disturbance after 2020) in percent"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "input_type": "gee_asset",
                 "input_data": "projects/ee-whisp/assets/example_plots",
@@ -81,6 +82,7 @@ class AnalyzeRequest(BaseModel):
                 "ind_4_threshold": 0.0
             }
         }
+    )
 
 
 class PlotStatistics(BaseModel):
@@ -122,8 +124,8 @@ class AnalyzeResponse(BaseModel):
         description="Additional information or warnings"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "success",
                 "num_features": 10,
@@ -140,6 +142,17 @@ class AnalyzeResponse(BaseModel):
                 "message": "Analysis completed successfully"
             }
         }
+    )
+
+
+class AnalyzeResponseFast(msgspec.Struct):
+    """Encoding-only counterpart of AnalyzeResponse used to build /analyze bodies"""
+    status: str
+    num_features: int
+    output_unit: str
+    risk_calculated: bool
+    results: msgspec.Raw  # already-serialized JSON array of result rows
+    message: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -154,10 +167,11 @@ class ErrorResponse(BaseModel):
     detail: str = Field(..., description="Error message")
     error_type: Optional[str] = Field(None, description="Type of error")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "detail": "Failed to process GEE asset",
                 "error_type": "GEEError"
             }
         }
+    )
@@ -0,0 +1 @@
+"""Shared data for the Whisp API test scripts"""
@@ -0,0 +1,30 @@
+"""
+Test plot and request constants shared by the Whisp API test scripts
+"""
+
+# Outer ring of the test plot in Brazil (Amazon, ~3000 ha)
+BASE_COORDS = [
+    (-60.0, -3.0),
+    (-60.0, -3.05),
+    (-59.95, -3.05),
+    (-59.95, -3.0),
+    (-60.0, -3.0)
+]
+
+# Single-feature FeatureCollection with the test plot
+TEMPLATE_DICT = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"id": 1, "name": "Test Plot"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[list(coord) for coord in BASE_COORDS]]
+            }
+        }
+    ]
+}
+
+# Headers for request bodies that are sent pre-serialized
+PAYLOAD_HEADERS = {"Content-Type": "application/json"}
@@ -0,0 +1,75 @@
+"""
+Shared pytest fixtures for Whisp API tests
+"""
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+
+import diskcache
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+api_root = Path(__file__).parent.parent
+if str(api_root) not in sys.path:
+    sys.path.insert(0, str(api_root))
+
+from app.main import app
+from app.api import routes
+from app.core import cache
+from app.core.config import settings
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient shared by the whole session; startup/shutdown events run once"""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def mock_stats(monkeypatch, tmp_path):
+    """
+    Stub out Earth Engine for /analyze and give it an empty results cache.
+
+    Returns the get_stats mock; the fetched stats have one row per input feature.
+    """
+    get_stats = Mock(side_effect=lambda fc, unit_type, whisp_image: fc)
+
+    def fake_fc_to_dataframe(fc):
+        return pd.DataFrame({
+            "plotId": range(1, len(fc["features"]) + 1),
+            "Area": [1.5] * len(fc["features"]),
+        })
+
+    monkeypatch.setattr(routes, "initialize_gee", lambda: True)
+    monkeypatch.setattr(routes.ee, "FeatureCollection", lambda geojson: geojson)
+    monkeypatch.setattr(routes, "combine_datasets", lambda: "whisp_image")
+    monkeypatch.setattr(routes, "get_stats", get_stats)
+    monkeypatch.setattr(routes, "fc_to_dataframe", fake_fc_to_dataframe)
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", True)
+
+    test_cache = diskcache.Cache(str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "_cache", test_cache)
+    yield get_stats
+    test_cache.close()
+
+
+@pytest.fixture
+def geojson_fc() -> dict:
+    """GeoJSON FeatureCollection of three small square polygons"""
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[i, 0], [i + 0.01, 0], [i + 0.01, 0.01], [i, 0.01], [i, 0]]]
+                }
+            }
+            for i in range(3)
+        ]
+    }
@@ -2,19 +2,29 @@
 Example Python client for testing Whisp API
 """
 import requests
-import json
 from typing import Dict, Any
 
 
 class WhispAPIClient:
-    """Simple client for interacting with Whisp API"""
+    """Simple client for interacting with Whisp API (reuses one HTTP connection pool)"""
 
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def close(self):
+        """Close the underlying HTTP session"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def health_check(self) -> Dict[str, Any]:
         """Check API health status"""
-        response = requests.get(f"{self.base_url}/health")
+        response = self.session.get(f"{self.base_url}/health")
         response.raise_for_status()
         return response.json()
 
@@ -54,7 +64,7 @@ class WhispAPIClient:
             "ind_4_threshold": ind_4_threshold
         }
 
-        response = requests.post(f"{self.base_url}/analyze", json=payload)
+        response = self.session.post(f"{self.base_url}/analyze", json=payload)
         response.raise_for_status()
         return response.json()
 
@@ -83,15 +93,10 @@ class WhispAPIClient:
         Returns:
             API response as dictionary
         """
-        # Convert dict to string if needed
-        if isinstance(geojson, dict):
-            geojson_str = json.dumps(geojson)
-        else:
-            geojson_str = geojson
-
+        # The API accepts GeoJSON either as an object or as a string
         payload = {
             "input_type": "geojson",
-            "input_data": geojson_str,
+            "input_data": geojson,
             "output_unit": output_unit,
             "calculate_risk": calculate_risk,
             "ind_1_threshold": ind_1_threshold,
@@ -100,7 +105,7 @@ class WhispAPIClient:
             "ind_4_threshold": ind_4_threshold
         }
 
-        response = requests.post(f"{self.base_url}/analyze", json=payload)
+        response = self.session.post(f"{self.base_url}/analyze", json=payload)
         response.raise_for_status()
         return response.json()
 
@@ -109,8 +114,12 @@ def example_usage():
     """Example usage of the Whisp API client"""
 
     # Initialize client
-    client = WhispAPIClient("http://localhost:8000")
+    with WhispAPIClient("http://localhost:8000") as client:
+        _run_examples(client)
+
 
+def _run_examples(client: WhispAPIClient):
+    """Run the example requests against the API"""
     print("=" * 60)
     print("Whisp API Client Examples")
     print("=" * 60)
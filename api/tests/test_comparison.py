@@ -4,92 +4,134 @@ Test script to compare local API results with production API results.
 Tests using the geojson_example.geojson file.
 """
 
-import json
-import requests
+import asyncio
+import hashlib
+import os
 import time
 from pathlib import Path
 
+import aiohttp
+import orjson
+
 # Configuration
 LOCAL_API_URL = "http://localhost:9006/analyze"
 PROD_API_URL = "https://whisp.openforis.org/api/submit/geojson"
 PROD_API_KEY = "c3fa0a20-ca9a-48f4-ae4a-b255c913776f"
 GEOJSON_PATH = Path("/mnt/c/Users/Alfonso Sanchez-Paus/git/whisp/input_examples/geojson_example.geojson")
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=300)
+
+# Retry policy for gateway errors
+RETRY_STATUSES = {502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.3
+
+# Set WHISP_USE_PROD_CACHE=1 while iterating on the local API to reuse saved
+# production responses instead of calling the production API every run.
+# Leave it unset (as in CI) to always hit the production API.
+USE_PROD_CACHE = os.environ.get("WHISP_USE_PROD_CACHE") == "1"
+PROD_CACHE_DIR = Path("/tmp/whisp_cache")
+
+def _cache_key(*parts):
+    """SHA-256 of the request parts (URL, payload, query parameters)."""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def _cache_get(key):
+    """Return the cached production response body for a key, or None."""
+    path = PROD_CACHE_DIR / f"{key}.json"
+    return path.read_bytes() if path.exists() else None
+
+def _cache_set(key, body):
+    """Save a production response body under a key."""
+    PROD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROD_CACHE_DIR / f"{key}.json").write_bytes(body)
+
+def create_session():
+    """Create a session with a pooled connector shared by both APIs."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=8),
+        json_serialize=lambda obj: orjson.dumps(obj).decode()
+    )
+
+async def post_with_retries(session, url, **kwargs):
+    """POST to url, retrying with backoff on gateway errors. Returns (status, body bytes)."""
+    for attempt in range(MAX_RETRIES + 1):
+        async with session.post(url, timeout=REQUEST_TIMEOUT, **kwargs) as response:
+            if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response.status, await response.read()
+        await asyncio.sleep(BACKOFF_FACTOR * (2 ** attempt))
 
 def load_geojson():
     """Load the test GeoJSON file."""
-    with open(GEOJSON_PATH, 'r') as f:
-        return json.load(f)
+    with open(GEOJSON_PATH, 'rb') as f:
+        return orjson.loads(f.read())
 
-def test_local_api(geojson_data):
+async def test_local_api(session, geojson_data):
     """Test the local API."""
-    print("=" * 80)
-    print("TESTING LOCAL API")
-    print("=" * 80)
-    print(f"Endpoint: {LOCAL_API_URL}")
-    print(f"Features: {len(geojson_data['features'])}")
-    print()
-
     start_time = time.time()
 
     try:
-        response = requests.post(
+        status_code, body = await post_with_retries(
+            session,
             LOCAL_API_URL,
             json={
                 "input_type": "geojson",
-                "input_data": json.dumps(geojson_data),
+                "input_data": geojson_data,
                 "output_unit": "ha",
                 "calculate_risk": True,
                 "ind_1_threshold": 10.0,
                 "ind_2_threshold": 10.0,
                 "ind_3_threshold": 0.0,
                 "ind_4_threshold": 0.0
-            },
-            timeout=300
+            }
         )
-
         elapsed = time.time() - start_time
-
-        print(f"Status Code: {response.status_code}")
-        print(f"Response Time: {elapsed:.2f} seconds")
-
-        if response.status_code == 200:
-            result = response.json()
-            print(f"Status: {result.get('status', 'N/A')}")
-            print(f"Features returned: {len(result.get('results', []))}")
-
-            # Show first feature properties (sample)
-            if result.get('results'):
-                first_result = result['results'][0]
-                print(f"\nFirst feature properties (sample):")
-                print(f"  - Keys count: {len(first_result)}")
-                print(f"  - Has 'EUDR_risk'?: {'EUDR_risk' in first_result}")
-                print(f"  - EUDR risk value: {first_result.get('EUDR_risk', 'N/A')}")
-
-                # Show a few dataset values as sample
-                sample_keys = [k for k in list(first_result.keys())[:5] if k not in ['FID', 'id', 'EUDR_risk']]
-                if sample_keys:
-                    print(f"  - Sample datasets:")
-                    for key in sample_keys:
-                        print(f"    {key}: {first_result.get(key)}")
-
-            return result
-        else:
-            print(f"Error: {response.text}")
-            return None
-
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        return None
+        status_code, body, elapsed, error = None, None, time.time() - start_time, e
+    else:
+        error = None
 
-def test_production_api(geojson_data):
-    """Test the production API."""
-    print("\n" + "=" * 80)
-    print("TESTING PRODUCTION API")
+    # Print the whole section once the call is done so concurrent output doesn't interleave
     print("=" * 80)
-    print(f"Endpoint: {PROD_API_URL}")
+    print("TESTING LOCAL API")
+    print("=" * 80)
+    print(f"Endpoint: {LOCAL_API_URL}")
     print(f"Features: {len(geojson_data['features'])}")
     print()
 
+    if error is not None:
+        print(f"Exception: {str(error)}")
+        return None
+
+    print(f"Status Code: {status_code}")
+    print(f"Response Time: {elapsed:.2f} seconds")
+
+    if status_code == 200:
+        result = orjson.loads(body)
+        print(f"Status: {result.get('status', 'N/A')}")
+        print(f"Features returned: {len(result.get('results', []))}")
+
+        # Show first feature properties (sample)
+        if result.get('results'):
+            first_result = result['results'][0]
+            print(f"\nFirst feature properties (sample):")
+            print(f"  - Keys count: {len(first_result)}")
+            print(f"  - Has 'EUDR_risk'?: {'EUDR_risk' in first_result}")
+            print(f"  - EUDR risk value: {first_result.get('EUDR_risk', 'N/A')}")
+
+            # Show a few dataset values as sample
+            sample_keys = [k for k in list(first_result.keys())[:5] if k not in ['FID', 'id', 'EUDR_risk']]
+            if sample_keys:
+                print(f"  - Sample datasets:")
+                for key in sample_keys:
+                    print(f"    {key}: {first_result.get(key)}")
+
+        return result
+    else:
+        print(f"Error: {body.decode(errors='replace')}")
+        return None
+
+async def test_production_api(session, geojson_data):
+    """Test the production API."""
     start_time = time.time()
 
     try:
@@ -103,63 +145,87 @@ def test_production_api(geojson_data):
             "ind_4_threshold": 0.0
         }
 
-        response = requests.post(
-            PROD_API_URL,
-            json=payload,
-            headers={
-                "X-API-Key": PROD_API_KEY,
-                "Content-Type": "application/json"
-            },
-            timeout=300
-        )
-
+        cache_key = _cache_key(PROD_API_URL, payload)
+        body = _cache_get(cache_key) if USE_PROD_CACHE else None
+        if body is not None:
+            status_code = 200
+        else:
+            # The API key only goes to production, so it is sent per request rather than on the session
+            status_code, body = await post_with_retries(
+                session,
+                PROD_API_URL,
+                json=payload,
+                headers={"X-API-Key": PROD_API_KEY}
+            )
+            if USE_PROD_CACHE and status_code == 200:
+                _cache_set(cache_key, body)
         elapsed = time.time() - start_time
+    except Exception as e:
+        status_code, body, elapsed, error = None, None, time.time() - start_time, e
+    else:
+        error = None
+
+    # Print the whole section once the call is done so concurrent output doesn't interleave
+    print("\n" + "=" * 80)
+    print("TESTING PRODUCTION API")
+    print("=" * 80)
+    print(f"Endpoint: {PROD_API_URL}")
+    print(f"Features: {len(geojson_data['features'])}")
+    print()
 
-        print(f"Status Code: {response.status_code}")
-        print(f"Response Time: {elapsed:.2f} seconds")
+    if error is not None:
+        print(f"Exception: {str(error)}")
+        return None
 
-        if response.status_code == 200:
-            result = response.json()
-            print(f"Success: {result.get('success', False)}")
+    print(f"Status Code: {status_code}")
+    print(f"Response Time: {elapsed:.2f} seconds")
 
-            # Production API returns data differently - check structure
-            data = result.get('data', result)
+    if status_code == 200:
+        result = orjson.loads(body)
+        print(f"Success: {result.get('success', False)}")
 
-            # Handle both possible response structures
-            if isinstance(data, dict) and 'features' in data:
-                features = data['features']
-            elif isinstance(data, list):
-                features = data
-            else:
-                features = []
-
-            print(f"Features returned: {len(features)}")
-
-            # Show first feature properties (sample)
-            if features:
-                first_feature = features[0]
-                props = first_feature.get('properties', first_feature)
-                print(f"\nFirst feature properties (sample):")
-                print(f"  - Keys count: {len(props)}")
-                print(f"  - Has 'eudr_risk'?: {'eudr_risk' in props}")
-                print(f"  - EUDR risk value: {props.get('eudr_risk', 'N/A')}")
-
-                # Show a few dataset values as sample
-                sample_keys = [k for k in list(props.keys())[:5] if k not in ['FID', 'id', 'eudr_risk']]
-                if sample_keys:
-                    print(f"  - Sample datasets:")
-                    for key in sample_keys:
-                        print(f"    {key}: {props.get(key)}")
-
-            return result
-        else:
-            print(f"Error: {response.text}")
-            return None
+        # Production API returns data differently - check structure
+        data = result.get('data', result)
 
-    except Exception as e:
-        print(f"Exception: {str(e)}")
+        # Handle both possible response structures
+        if isinstance(data, dict) and 'features' in data:
+            features = data['features']
+        elif isinstance(data, list):
+            features = data
+        else:
+            features = []
+
+        print(f"Features returned: {len(features)}")
+
+        # Show first feature properties (sample)
+        if features:
+            first_feature = features[0]
+            props = first_feature.get('properties', first_feature)
+            print(f"\nFirst feature properties (sample):")
+            print(f"  - Keys count: {len(props)}")
+            print(f"  - Has 'eudr_risk'?: {'eudr_risk' in props}")
+            print(f"  - EUDR risk value: {props.get('eudr_risk', 'N/A')}")
+
+            # Show a few dataset values as sample
+            sample_keys = [k for k in list(props.keys())[:5] if k not in ['FID', 'id', 'eudr_risk']]
+            if sample_keys:
+                print(f"  - Sample datasets:")
+                for key in sample_keys:
+                    print(f"    {key}: {props.get(key)}")
+
+        return result
+    else:
+        print(f"Error: {body.decode(errors='replace')}")
         return None
 
+async def run_api_tests(geojson_data):
+    """Call the local and production APIs concurrently over one shared session."""
+    async with create_session() as session:
+        return await asyncio.gather(
+            test_local_api(session, geojson_data),
+            test_production_api(session, geojson_data)
+        )
+
 def compare_results(local_result, prod_result):
     """Compare results from local and production APIs."""
     print("\n" + "=" * 80)
@@ -253,11 +319,8 @@ def main():
     print(f"Loaded GeoJSON with {len(geojson_data['features'])} features")
     print()
 
-    # Test local API
-    local_result = test_local_api(geojson_data)
-
-    # Test production API
-    prod_result = test_production_api(geojson_data)
+    # Test local and production APIs concurrently
+    local_result, prod_result = asyncio.run(run_api_tests(geojson_data))
 
     # Compare results
     compare_results(local_result, prod_result)
@@ -4,10 +4,13 @@ Test script to compare local API results with production API results.
 Tests using the geojson_example.geojson file and generates an Excel comparison report.
 """
 
-import json
-import requests
+import asyncio
+import hashlib
+import os
 import time
 from pathlib import Path
+import aiohttp
+import orjson
 import pandas as pd
 from datetime import datetime
 
@@ -17,24 +20,52 @@ PROD_API_URL = "https://whisp.openforis.org/api/submit/geojson"
 PROD_API_KEY = "c3fa0a20-ca9a-48f4-ae4a-b255c913776f"
 GEOJSON_PATH = Path("/mnt/c/Users/Alfonso Sanchez-Paus/git/whisp/input_examples/geojson_example.geojson")
 OUTPUT_PATH = Path("/mnt/c/Users/Alfonso Sanchez-Paus/git/whisp/api/tests/api_comparison_results.xlsx")
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=300)
+
+# Set WHISP_USE_PROD_CACHE=1 while iterating on the local API to reuse saved
+# production responses instead of calling the production API every run.
+# Leave it unset (as in CI) to always hit the production API.
+USE_PROD_CACHE = os.environ.get("WHISP_USE_PROD_CACHE") == "1"
+PROD_CACHE_DIR = Path("/tmp/whisp_cache")
+
+# Risk columns compared per feature (EUDR risk first, then indicators 1-4)
+RISK_COLS = [
+    'EUDR_risk',
+    'Indicator_1_treecover',
+    'Indicator_2_commodities',
+    'Indicator_3_disturbance_before_2020',
+    'Indicator_4_disturbance_after_2020'
+]
+
+def _cache_key(*parts):
+    """SHA-256 of the request parts (URL, payload, query parameters)."""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def _cache_get(key):
+    """Return the cached production response body for a key, or None."""
+    path = PROD_CACHE_DIR / f"{key}.json"
+    return path.read_bytes() if path.exists() else None
+
+def _cache_set(key, body):
+    """Save a production response body under a key."""
+    PROD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROD_CACHE_DIR / f"{key}.json").write_bytes(body)
 
 def load_geojson():
     """Load the test GeoJSON file."""
-    with open(GEOJSON_PATH, 'r') as f:
-        return json.load(f)
+    with open(GEOJSON_PATH, 'rb') as f:
+        return orjson.loads(f.read())
 
-def test_local_api(geojson_data):
+async def test_local_api(session, geojson_data):
     """Test the local API."""
-    print("Testing Local API...")
-
     start_time = time.time()
 
     try:
-        response = requests.post(
+        async with session.post(
             LOCAL_API_URL,
             json={
                 "input_type": "geojson",
-                "input_data": json.dumps(geojson_data),
+                "input_data": geojson_data,
                 "output_unit": "ha",
                 "calculate_risk": True,
                 "ind_1_threshold": 10.0,
@@ -42,52 +73,59 @@ def test_local_api(geojson_data):
                 "ind_3_threshold": 0.0,
                 "ind_4_threshold": 0.0
             },
-            timeout=300
-        )
+            timeout=REQUEST_TIMEOUT
+        ) as response:
+            status_code = response.status
+            body = await response.read()
 
         elapsed = time.time() - start_time
 
-        if response.status_code == 200:
-            result = response.json()
-            print(f"  ✓ Success - {len(result.get('results', []))} features in {elapsed:.2f}s")
+        if status_code == 200:
+            result = orjson.loads(body)
+            print(f"Local API: ✓ Success - {len(result.get('results', []))} features in {elapsed:.2f}s")
             return result, elapsed
         else:
-            print(f"  ✗ Error {response.status_code}: {response.text}")
+            print(f"Local API: ✗ Error {status_code}: {body.decode(errors='replace')}")
             return None, elapsed
 
     except Exception as e:
-        print(f"  ✗ Exception: {str(e)}")
+        print(f"Local API: ✗ Exception: {str(e)}")
         return None, 0
 
-def test_production_api(geojson_data):
+async def test_production_api(session, geojson_data):
     """Test the production API."""
-    print("Testing Production API...")
-
     start_time = time.time()
 
     try:
         # Production API expects GeoJSON directly, with query parameters for options
-        response = requests.post(
-            PROD_API_URL,
-            json=geojson_data,
-            params={
-                "calculate_risk": "true",
-                "ind_1_threshold": 10.0,
-                "ind_2_threshold": 10.0,
-                "ind_3_threshold": 0.0,
-                "ind_4_threshold": 0.0
-            },
-            headers={
-                "X-API-Key": PROD_API_KEY,
-                "Content-Type": "application/json"
-            },
-            timeout=300
-        )
+        params = {
+            "calculate_risk": "true",
+            "ind_1_threshold": 10.0,
+            "ind_2_threshold": 10.0,
+            "ind_3_threshold": 0.0,
+            "ind_4_threshold": 0.0
+        }
+        cache_key = _cache_key(PROD_API_URL, geojson_data, params)
+        body = _cache_get(cache_key) if USE_PROD_CACHE else None
+        if body is not None:
+            status_code = 200
+        else:
+            async with session.post(
+                PROD_API_URL,
+                json=geojson_data,
+                params=params,
+                headers={"X-API-Key": PROD_API_KEY},
+                timeout=REQUEST_TIMEOUT
+            ) as response:
+                status_code = response.status
+                body = await response.read()
+            if USE_PROD_CACHE and status_code == 200:
+                _cache_set(cache_key, body)
 
         elapsed = time.time() - start_time
 
-        if response.status_code == 200:
-            result = response.json()
+        if status_code == 200:
+            result = orjson.loads(body)
 
             # Extract features from response
             data = result.get('data', result)
@@ -98,16 +136,24 @@ def test_production_api(geojson_data):
             else:
                 features = []
 
-            print(f"  ✓ Success - {len(features)} features in {elapsed:.2f}s")
+            print(f"Production API: ✓ Success - {len(features)} features in {elapsed:.2f}s")
             return result, elapsed, features
         else:
-            print(f"  ✗ Error {response.status_code}: {response.text}")
+            print(f"Production API: ✗ Error {status_code}: {body.decode(errors='replace')}")
             return None, elapsed, []
 
     except Exception as e:
-        print(f"  ✗ Exception: {str(e)}")
+        print(f"Production API: ✗ Exception: {str(e)}")
         return None, 0, []
 
+async def run_api_tests(geojson_data):
+    """Call the local and production APIs concurrently over one shared session."""
+    async with aiohttp.ClientSession(json_serialize=lambda obj: orjson.dumps(obj).decode()) as session:
+        return await asyncio.gather(
+            test_local_api(session, geojson_data),
+            test_production_api(session, geojson_data)
+        )
+
 def create_comparison_excel(local_result, local_time, prod_result, prod_time, prod_features):
     """Create comprehensive Excel comparison report."""
 
@@ -115,9 +161,26 @@ def create_comparison_excel(local_result, local_time, prod_result, prod_time, pr
 
     # Extract data
     local_features = local_result.get('results', []) if local_result else []
+    prod_props_list = [f.get('properties', f) for f in prod_features]
+    both_available = bool(local_features and prod_features)
+
+    # Property names of the first feature on each side, shared by all sheets
+    local_props_first = local_features[0] if local_features else {}
+    prod_props_first = prod_props_list[0] if prod_props_list else {}
+    local_keys = set(local_props_first)
+    prod_keys = set(prod_props_first)
+    common = local_keys & prod_keys
+    only_local = local_keys - prod_keys
+    only_prod = prod_keys - local_keys
 
     # Create Excel writer
-    with pd.ExcelWriter(OUTPUT_PATH, engine='openpyxl') as writer:
+    # xlsxwriter streams plain cell values far faster than openpyxl. constant_memory
+    # mode is not used: pandas writes cells column by column, which that mode drops.
+    with pd.ExcelWriter(
+        OUTPUT_PATH,
+        engine='xlsxwriter',
+        engine_kwargs={'options': {'strings_to_numbers': False, 'strings_to_urls': False}}
+    ) as writer:
 
         # Sheet 1: Summary
         summary_data = {
@@ -141,52 +204,38 @@ def create_comparison_excel(local_result, local_time, prod_result, prod_time, pr
                 f"{prod_time:.2f}",
                 local_result.get('status', 'N/A') if local_result else 'Failed',
                 'Success' if prod_features else 'Failed',
-                len(local_features[0]) if local_features else 0,
-                len(prod_features[0].get('properties', {})) if prod_features else 0,
-                '', '', ''  # Will be filled in below
+                len(local_keys),
+                len(prod_keys),
+                len(common) if both_available else '',
+                len(only_local) if both_available else '',
+                len(only_prod) if both_available else ''
             ]
         }
 
-        if local_features and prod_features:
-            local_keys = set(local_features[0].keys())
-            prod_keys = set(prod_features[0].get('properties', {}).keys())
-            common = local_keys & prod_keys
-            only_local = local_keys - prod_keys
-            only_prod = prod_keys - local_keys
-
-            summary_data['Value'][8] = len(common)
-            summary_data['Value'][9] = len(only_local)
-            summary_data['Value'][10] = len(only_prod)
-
         summary_df = pd.DataFrame(summary_data)
         summary_df.to_excel(writer, sheet_name='Summary', index=False)
 
         # Sheet 2: Local Results (all features, all properties)
         if local_features:
-            local_df = pd.DataFrame(local_features)
+            # Local results come from one DataFrame, so every row has the first row's keys
+            local_df = pd.DataFrame.from_records(local_features, columns=list(local_props_first))
             local_df.to_excel(writer, sheet_name='Local Results', index=False)
             print(f"  ✓ Local Results: {len(local_df)} rows, {len(local_df.columns)} columns")
 
         # Sheet 3: Production Results (all features, all properties)
         if prod_features:
-            # Extract properties from features
-            prod_props = [f.get('properties', f) for f in prod_features]
-            prod_df = pd.DataFrame(prod_props)
+            # Production rows may differ in keys; take the union in first-seen order
+            prod_columns = list(dict.fromkeys(key for props in prod_props_list for key in props))
+            prod_df = pd.DataFrame.from_records(prod_props_list, columns=prod_columns)
             prod_df.to_excel(writer, sheet_name='Production Results', index=False)
             print(f"  ✓ Production Results: {len(prod_df)} rows, {len(prod_df.columns)} columns")
 
         # Sheet 4: Side-by-Side Comparison (first feature only for readability)
-        if local_features and prod_features:
-            local_props = local_features[0]
-            prod_props = prod_features[0].get('properties', prod_features[0])
-
-            # Get all unique keys
-            all_keys = sorted(set(list(local_props.keys()) + list(prod_props.keys())))
-
+        if both_available:
             comparison_data = []
-            for key in all_keys:
-                local_val = local_props.get(key, 'N/A')
-                prod_val = prod_props.get(key, 'N/A')
+            for key in sorted(local_keys | prod_keys):
+                local_val = local_props_first.get(key, 'N/A')
+                prod_val = prod_props_first.get(key, 'N/A')
 
                 # Determine if values match
                 if local_val == 'N/A' or prod_val == 'N/A':
@@ -212,57 +261,55 @@ def create_comparison_excel(local_result, local_time, prod_result, prod_time, pr
             print(f"  ✓ First Feature Comparison: {len(comparison_df)} properties")
 
         # Sheet 5: EUDR Risk Comparison (all features)
-        if local_features and prod_features:
-            risk_data = []
-            for i in range(min(len(local_features), len(prod_features))):
-                local_risk = local_features[i].get('EUDR_risk', 'N/A')
-                prod_props = prod_features[i].get('properties', prod_features[i])
-                prod_risk = prod_props.get('eudr_risk', prod_props.get('EUDR_risk', 'N/A'))
-
-                match = 'Match' if str(local_risk).lower() == str(prod_risk).lower() else 'Different'
-
-                risk_data.append({
-                    'Feature Index': i,
-                    'Local EUDR Risk': local_risk,
-                    'Production EUDR Risk': prod_risk,
-                    'Match': match,
-                    'Local Ind 1': local_features[i].get('Indicator_1_treecover', 'N/A'),
-                    'Prod Ind 1': prod_props.get('indicator_1_treecover', prod_props.get('Indicator_1_treecover', 'N/A')),
-                    'Local Ind 2': local_features[i].get('Indicator_2_commodities', 'N/A'),
-                    'Prod Ind 2': prod_props.get('indicator_2_commodities', prod_props.get('Indicator_2_commodities', 'N/A')),
-                    'Local Ind 3': local_features[i].get('Indicator_3_disturbance_before_2020', 'N/A'),
-                    'Prod Ind 3': prod_props.get('indicator_3_disturbance_before_2020', prod_props.get('Indicator_3_disturbance_before_2020', 'N/A')),
-                    'Local Ind 4': local_features[i].get('Indicator_4_disturbance_after_2020', 'N/A'),
-                    'Prod Ind 4': prod_props.get('indicator_4_disturbance_after_2020', prod_props.get('Indicator_4_disturbance_after_2020', 'N/A'))
-                })
+        if both_available:
+            n_features = min(len(local_features), len(prod_features))
+            local_risk_df = pd.DataFrame(local_features[:n_features]).reindex(columns=RISK_COLS)
+
+            # Production may use lowercase names; prefer them, falling back to the local spelling
+            prod_raw_df = pd.DataFrame(prod_props_list[:n_features])
+            prod_risk_df = pd.DataFrame({
+                col: prod_raw_df[col.lower()] if col.lower() in prod_raw_df else prod_raw_df.get(col)
+                for col in RISK_COLS
+            }, index=prod_raw_df.index)
+
+            local_risk_df = local_risk_df.fillna('N/A')
+            prod_risk_df = prod_risk_df.fillna('N/A')
+
+            risk_match = (
+                local_risk_df['EUDR_risk'].astype(str).str.lower()
+                == prod_risk_df['EUDR_risk'].astype(str).str.lower()
+            )
+            risk_df = pd.DataFrame({
+                'Feature Index': range(n_features),
+                'Local EUDR Risk': local_risk_df['EUDR_risk'],
+                'Production EUDR Risk': prod_risk_df['EUDR_risk'],
+                'Match': risk_match.map({True: 'Match', False: 'Different'})
+            })
+            for i, col in enumerate(RISK_COLS[1:], 1):
+                risk_df[f'Local Ind {i}'] = local_risk_df[col]
+                risk_df[f'Prod Ind {i}'] = prod_risk_df[col]
 
-            risk_df = pd.DataFrame(risk_data)
             risk_df.to_excel(writer, sheet_name='EUDR Risk Comparison', index=False)
             print(f"  ✓ EUDR Risk Comparison: {len(risk_df)} features")
 
         # Sheet 6: Property Differences
-        if local_features and prod_features:
-            local_keys = set(local_features[0].keys())
-            prod_keys = set(prod_features[0].get('properties', {}).keys())
-
+        if both_available:
             diff_data = []
 
             # Properties only in local
-            only_local = local_keys - prod_keys
             for key in sorted(only_local):
                 diff_data.append({
                     'Property': key,
                     'Location': 'Only in Local',
-                    'Sample Value': str(local_features[0].get(key, ''))[:100]
+                    'Sample Value': str(local_props_first.get(key, ''))[:100]
                 })
 
             # Properties only in production
-            only_prod = prod_keys - local_keys
             for key in sorted(only_prod):
                 diff_data.append({
                     'Property': key,
                     'Location': 'Only in Production',
-                    'Sample Value': str(prod_features[0].get('properties', {}).get(key, ''))[:100]
+                    'Sample Value': str(prod_props_first.get(key, ''))[:100]
                 })
 
             if diff_data:
@@ -271,38 +318,30 @@ def create_comparison_excel(local_result, local_time, prod_result, prod_time, pr
                 print(f"  ✓ Property Differences: {len(diff_df)} differences")
 
         # Sheet 7: Value Differences (properties with different values)
-        if local_features and prod_features:
-            value_diff_data = []
-
-            local_props = local_features[0]
-            prod_props = prod_features[0].get('properties', prod_features[0])
-            common_keys = set(local_props.keys()) & set(prod_props.keys())
-
-            for key in sorted(common_keys):
-                local_val = local_props.get(key)
-                prod_val = prod_props.get(key)
-
-                # Check if values are different
-                if isinstance(local_val, (int, float)) and isinstance(prod_val, (int, float)):
-                    if abs(float(local_val) - float(prod_val)) >= 0.01:
-                        value_diff_data.append({
-                            'Property': key,
-                            'Local Value': local_val,
-                            'Production Value': prod_val,
-                            'Absolute Difference': abs(float(local_val) - float(prod_val)),
-                            'Relative Difference %': abs(float(local_val) - float(prod_val)) / max(abs(float(local_val)), 0.0001) * 100 if local_val != 0 else 'N/A'
-                        })
-                elif str(local_val) != str(prod_val):
-                    value_diff_data.append({
-                        'Property': key,
-                        'Local Value': str(local_val)[:100],
-                        'Production Value': str(prod_val)[:100],
-                        'Absolute Difference': 'N/A (text)',
-                        'Relative Difference %': 'N/A'
-                    })
-
-            if value_diff_data:
-                value_diff_df = pd.DataFrame(value_diff_data)
+        if both_available:
+            common_keys = sorted(common)
+
+            # Align both features' values by property and compare them in one vectorized pass
+            local_ser = pd.Series([local_props_first[k] for k in common_keys], index=common_keys, dtype=object)
+            prod_ser = pd.Series([prod_props_first[k] for k in common_keys], index=common_keys, dtype=object)
+            local_num = pd.to_numeric(local_ser, errors='coerce')
+            prod_num = pd.to_numeric(prod_ser, errors='coerce')
+
+            both_num = local_num.notna() & prod_num.notna()
+            abs_diff = (local_num - prod_num).abs()
+            rel_diff = abs_diff / local_num.abs().clip(lower=0.0001) * 100
+            mismatch_num = both_num & (abs_diff >= 0.01)
+            mismatch_str = ~both_num & (local_ser.astype(str) != prod_ser.astype(str))
+
+            value_diff_df = pd.DataFrame({
+                'Property': common_keys,
+                'Local Value': local_ser.where(both_num, local_ser.astype(str).str[:100]),
+                'Production Value': prod_ser.where(both_num, prod_ser.astype(str).str[:100]),
+                'Absolute Difference': abs_diff.astype(object).where(both_num, 'N/A (text)'),
+                'Relative Difference %': rel_diff.astype(object).where(both_num & (local_num != 0), 'N/A')
+            }, index=common_keys).loc[mismatch_num | mismatch_str]
+
+            if not value_diff_df.empty:
                 value_diff_df.to_excel(writer, sheet_name='Value Differences', index=False)
                 print(f"  ✓ Value Differences: {len(value_diff_df)} properties with different values")
 
@@ -321,11 +360,11 @@ def main():
     geojson_data = load_geojson()
     print(f"Loaded GeoJSON with {len(geojson_data['features'])} features\n")
 
-    # Test local API
-    local_result, local_time = test_local_api(geojson_data)
-
-    # Test production API
-    prod_result, prod_time, prod_features = test_production_api(geojson_data)
+    # Test local and production APIs concurrently
+    print("Testing Local and Production APIs...")
+    (local_result, local_time), (prod_result, prod_time, prod_features) = asyncio.run(
+        run_api_tests(geojson_data)
+    )
 
     # Generate Excel comparison
     if local_result or prod_result:
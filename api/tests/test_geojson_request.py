@@ -1,14 +1,24 @@
 """
 Test script to send a GeoJSON to the Whisp API
+
+Usage:
+    python test_geojson_request.py                      # send the built-in example
+    python test_geojson_request.py a.geojson b.geojson  # merge the files into one request
 """
+import sys
+from collections import defaultdict
+
 import requests
-import json
+import orjson
 
 # API endpoint
 API_URL = "http://localhost:9005/analyze"
 
+# Where the full response is saved
+OUTPUT_FILE = "/mnt/c/Users/Alfonso Sanchez-Paus/git/whisp/api/tests/test_response.json"
+
 # Example GeoJSON - a small polygon in Brazil (Amazon region)
-geojson = {
+EXAMPLE_GEOJSON = {
     "type": "FeatureCollection",
     "features": [
         {
@@ -52,116 +62,162 @@ geojson = {
     ]
 }
 
-# Convert GeoJSON to string
-geojson_str = json.dumps(geojson)
-
-# Prepare request payload
-payload = {
-    "input_type": "geojson",
-    "input_data": geojson_str,
-    "output_unit": "ha",
-    "calculate_risk": True,
-    "ind_1_threshold": 10.0,
-    "ind_2_threshold": 10.0,
-    "ind_3_threshold": 0.0,
-    "ind_4_threshold": 0.0
+# Property used to tag each feature with the file it came from
+SOURCE_PROPERTY = "__source_file"
+
+# Columns printed separately from the dataset statistics
+SUMMARY_COLUMNS = {
+    'Plot_ID', 'Plot_area_ha', 'Geometry_type', 'Country',
+    'Admin_Level_1', 'Centroid_lon', 'Centroid_lat',
+    'In_waterbody', 'Unit', 'Indicator_1_treecover',
+    'Indicator_2_commodities', 'Indicator_3_disturbance_before_2020',
+    'Indicator_4_disturbance_after_2020', 'EUDR_risk', SOURCE_PROPERTY
 }
 
-print("=" * 70)
-print("Testing Whisp API with GeoJSON")
-print("=" * 70)
-print(f"\nAPI URL: {API_URL}")
-print(f"Number of features: {len(geojson['features'])}")
-print(f"Output unit: {payload['output_unit']}")
-print(f"Calculate risk: {payload['calculate_risk']}")
-print("\nSending request...")
-print("-" * 70)
-
-try:
-    # Send POST request
-    response = requests.post(API_URL, json=payload, timeout=120)
-
-    # Check response status
-    print(f"\nResponse Status Code: {response.status_code}")
-
-    if response.status_code == 200:
-        print("✓ Success!")
-
-        # Parse response
-        result = response.json()
-
-        print("\nResponse Summary:")
-        print("-" * 70)
-        print(f"Status: {result['status']}")
-        print(f"Number of features analyzed: {result['num_features']}")
-        print(f"Output unit: {result['output_unit']}")
-        print(f"Risk calculated: {result['risk_calculated']}")
-        print(f"Message: {result.get('message', 'N/A')}")
-
-        # Display results for each plot
-        if result.get('results'):
-            print("\nPlot Results:")
-            print("=" * 70)
-            for i, plot in enumerate(result['results'], 1):
-                print(f"\nPlot {i}:")
-                print(f"  ID: {plot.get('Plot_ID', 'N/A')}")
-                print(f"  Area: {plot.get('Plot_area_ha', 'N/A')} ha")
-                print(f"  Country: {plot.get('Country', 'N/A')}")
-                print(f"  Admin Level 1: {plot.get('Admin_Level_1', 'N/A')}")
-                print(f"  Centroid: ({plot.get('Centroid_lon', 'N/A')}, {plot.get('Centroid_lat', 'N/A')})")
-                print(f"  In Waterbody: {plot.get('In_waterbody', 'N/A')}")
-
-                if result['risk_calculated']:
-                    print(f"\n  Risk Indicators:")
-                    print(f"    Indicator 1 (Treecover): {plot.get('Indicator_1_treecover', 'N/A')}")
-                    print(f"    Indicator 2 (Commodities): {plot.get('Indicator_2_commodities', 'N/A')}")
-                    print(f"    Indicator 3 (Disturbance before 2020): {plot.get('Indicator_3_disturbance_before_2020', 'N/A')}")
-                    print(f"    Indicator 4 (Disturbance after 2020): {plot.get('Indicator_4_disturbance_after_2020', 'N/A')}")
-                    print(f"    EUDR Risk: {plot.get('EUDR_risk', 'N/A')}")
-
-                # Show a few dataset statistics
-                print(f"\n  Sample Statistics:")
-                dataset_count = 0
-                for key, value in plot.items():
-                    if key not in ['Plot_ID', 'Plot_area_ha', 'Geometry_type', 'Country',
-                                   'Admin_Level_1', 'Centroid_lon', 'Centroid_lat',
-                                   'In_waterbody', 'Unit', 'Indicator_1_treecover',
-                                   'Indicator_2_commodities', 'Indicator_3_disturbance_before_2020',
-                                   'Indicator_4_disturbance_after_2020', 'EUDR_risk']:
-                        if dataset_count < 5:  # Show first 5 datasets
-                            print(f"    {key}: {value}")
-                            dataset_count += 1
-
-                if dataset_count < len(plot) - 14:
-                    print(f"    ... and {len(plot) - dataset_count - 14} more datasets")
-
-        # Save full response to file
-        output_file = "/mnt/c/Users/Alfonso Sanchez-Paus/git/whisp/api/tests/test_response.json"
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=2)
-        print(f"\n✓ Full response saved to: {output_file}")
-
-    else:
-        print("✗ Error!")
-        print("\nError Details:")
-        print("-" * 70)
-        try:
-            error = response.json()
-            print(json.dumps(error, indent=2))
-        except:
-            print(response.text)
-
-except requests.exceptions.Timeout:
-    print("\n✗ Request timed out!")
-    print("The analysis may take longer for large datasets.")
-
-except requests.exceptions.ConnectionError:
-    print("\n✗ Connection error!")
-    print("Make sure the API server is running at http://localhost:9005")
-
-except Exception as e:
-    print(f"\n✗ Unexpected error: {e}")
-
-print("\n" + "=" * 70)
-print("Test complete!")
-print("=" * 70)
+
+def merged_geojson(paths):
+    """
+    Merge several GeoJSON files into one FeatureCollection
+
+    Each feature is tagged with its file name in properties[SOURCE_PROPERTY] so
+    the per-feature results can be split back by file after a single request.
+    """
+    features = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            for feature in orjson.loads(f.read())["features"]:
+                feature["properties"] = dict(feature.get("properties") or {}, **{SOURCE_PROPERTY: path})
+                features.append(feature)
+    return {"type": "FeatureCollection", "features": features}
+
+
+def build_payload(geojson):
+    """Build the /analyze request payload for a FeatureCollection"""
+    return {
+        "input_type": "geojson",
+        "input_data": geojson,
+        "output_unit": "ha",
+        "calculate_risk": True,
+        "ind_1_threshold": 10.0,
+        "ind_2_threshold": 10.0,
+        "ind_3_threshold": 0.0,
+        "ind_4_threshold": 0.0
+    }
+
+
+def print_plot(i, plot, risk_calculated):
+    """Print the results for one plot"""
+    print(f"\nPlot {i}:")
+    print(f"  ID: {plot.get('Plot_ID', 'N/A')}")
+    print(f"  Area: {plot.get('Plot_area_ha', 'N/A')} ha")
+    print(f"  Country: {plot.get('Country', 'N/A')}")
+    print(f"  Admin Level 1: {plot.get('Admin_Level_1', 'N/A')}")
+    print(f"  Centroid: ({plot.get('Centroid_lon', 'N/A')}, {plot.get('Centroid_lat', 'N/A')})")
+    print(f"  In Waterbody: {plot.get('In_waterbody', 'N/A')}")
+
+    if risk_calculated:
+        print(f"\n  Risk Indicators:")
+        print(f"    Indicator 1 (Treecover): {plot.get('Indicator_1_treecover', 'N/A')}")
+        print(f"    Indicator 2 (Commodities): {plot.get('Indicator_2_commodities', 'N/A')}")
+        print(f"    Indicator 3 (Disturbance before 2020): {plot.get('Indicator_3_disturbance_before_2020', 'N/A')}")
+        print(f"    Indicator 4 (Disturbance after 2020): {plot.get('Indicator_4_disturbance_after_2020', 'N/A')}")
+        print(f"    EUDR Risk: {plot.get('EUDR_risk', 'N/A')}")
+
+    # Show a few dataset statistics
+    print(f"\n  Sample Statistics:")
+    datasets = [key for key in plot if key not in SUMMARY_COLUMNS]
+    for key in datasets[:5]:  # Show first 5 datasets
+        print(f"    {key}: {plot[key]}")
+
+    if len(datasets) > 5:
+        print(f"    ... and {len(datasets) - 5} more datasets")
+
+
+def main(paths=None):
+    """Send the example GeoJSON, or all the given GeoJSON files merged into one request"""
+    geojson = merged_geojson(paths) if paths else EXAMPLE_GEOJSON
+    payload = build_payload(geojson)
+
+    print("=" * 70)
+    print("Testing Whisp API with GeoJSON")
+    print("=" * 70)
+    print(f"\nAPI URL: {API_URL}")
+    if paths:
+        print(f"GeoJSON files: {len(paths)}")
+    print(f"Number of features: {len(geojson['features'])}")
+    print(f"Output unit: {payload['output_unit']}")
+    print(f"Calculate risk: {payload['calculate_risk']}")
+    print("\nSending request...")
+    print("-" * 70)
+
+    try:
+        # Send POST request, streaming the body so a successful response goes straight to disk
+        with requests.post(API_URL, json=payload, stream=True, timeout=120) as response:
+
+            # Check response status
+            print(f"\nResponse Status Code: {response.status_code}")
+
+            if response.status_code == 200:
+                with open(OUTPUT_FILE, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
+            else:
+                error_body = response.content
+
+        if response.status_code == 200:
+            print("✓ Success!")
+
+            # Parse the saved response for the summary
+            with open(OUTPUT_FILE, 'rb') as f:
+                result = orjson.loads(f.read())
+
+            print("\nResponse Summary:")
+            print("-" * 70)
+            print(f"Status: {result['status']}")
+            print(f"Number of features analyzed: {result['num_features']}")
+            print(f"Output unit: {result['output_unit']}")
+            print(f"Risk calculated: {result['risk_calculated']}")
+            print(f"Message: {result.get('message', 'N/A')}")
+
+            # Display results for each plot, grouped by source file when several were merged
+            if result.get('results'):
+                groups = defaultdict(list)
+                for plot in result['results']:
+                    groups[plot.get(SOURCE_PROPERTY)].append(plot)
+
+                for source, plots in groups.items():
+                    print("\nPlot Results" + (f" ({source}):" if source else ":"))
+                    print("=" * 70)
+                    for i, plot in enumerate(plots, 1):
+                        print_plot(i, plot, result['risk_calculated'])
+
+            print(f"\n✓ Full response saved to: {OUTPUT_FILE}")
+
+        else:
+            print("✗ Error!")
+            print("\nError Details:")
+            print("-" * 70)
+            try:
+                error = orjson.loads(error_body)
+                print(orjson.dumps(error, option=orjson.OPT_INDENT_2).decode())
+            except:
+                print(error_body.decode(errors='replace'))
+
+    except requests.exceptions.Timeout:
+        print("\n✗ Request timed out!")
+        print("The analysis may take longer for large datasets.")
+
+    except requests.exceptions.ConnectionError:
+        print("\n✗ Connection error!")
+        print("Make sure the API server is running at http://localhost:9005")
+
+    except Exception as e:
+        print(f"\n✗ Unexpected error: {e}")
+
+    print("\n" + "=" * 70)
+    print("Test complete!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
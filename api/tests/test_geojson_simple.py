@@ -2,32 +2,13 @@
 Simple test script - GeoJSON without risk calculation
 """
 import requests
-import json
+import orjson
 
-# Example GeoJSON - small polygon in Brazil
-geojson = {
-    "type": "FeatureCollection",
-    "features": [
-        {
-            "type": "Feature",
-            "properties": {"id": 1, "name": "Test Plot"},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-60.0, -3.0],
-                    [-60.0, -3.05],
-                    [-59.95, -3.05],
-                    [-59.95, -3.0],
-                    [-60.0, -3.0]
-                ]]
-            }
-        }
-    ]
-}
+from _shared.fixtures import TEMPLATE_DICT, PAYLOAD_HEADERS
 
 payload = {
     "input_type": "geojson",
-    "input_data": json.dumps(geojson),
+    "input_data": TEMPLATE_DICT,
     "output_unit": "ha",
     "calculate_risk": False  # Test without risk first
 }
@@ -35,19 +16,24 @@ payload = {
 print("Testing Whisp API with GeoJSON (no risk calculation)...")
 print("=" * 70)
 
-response = requests.post("http://localhost:9005/analyze", json=payload, timeout=120)
+response = requests.post(
+    "http://localhost:9005/analyze",
+    data=orjson.dumps(payload),
+    headers=PAYLOAD_HEADERS,
+    timeout=120
+)
 
 print(f"Status Code: {response.status_code}")
 
 if response.status_code == 200:
-    result = response.json()
+    result = orjson.loads(response.content)
     print("\n✓ SUCCESS!")
     print(f"Status: {result['status']}")
     print(f"Features: {result['num_features']}")
     print(f"\nFirst Plot Data:")
     if result['results']:
         plot = result['results'][0]
-        print(json.dumps(plot, indent=2))
+        print(orjson.dumps(plot, option=orjson.OPT_INDENT_2).decode())
 else:
     print("\n✗ ERROR:")
-    print(json.dumps(response.json(), indent=2))
+    print(orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode())
@@ -1,67 +1,106 @@
 """
 Load testing script for Whisp API
 Tests how response time changes with concurrent requests
+
+Usage:
+    python test_load.py               # every request uses a different plot
+    python test_load.py --cache-mode  # also measure identical requests (server cache hits)
+    python test_load.py --rps 2       # also run an open-loop test at 2 requests/second
+    python test_load.py --http2       # multiplex concurrent requests over one HTTP/2 connection
 """
+import argparse
+import asyncio
+import httpx
+import orjson
+import os
 import requests
-import json
+import sys
 import time
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import defaultdict
-import statistics
+from collections import Counter
+from functools import lru_cache
+import math
+
+from _shared.fixtures import BASE_COORDS, PAYLOAD_HEADERS
 
 # API endpoint
 API_URL = "http://localhost:9006/analyze"
+HEALTH_URL = "http://localhost:9006/health"
+
+# Latency objective: the run exits with status 1 if any test's p99 exceeds it
+TARGET_P99_MS = int(os.getenv("TARGET_P99_MS", "5000"))
+
+# Largest concurrency level used by the tests
+MAX_WORKERS = 10
+
+# Shared session for the sequential requests, so the keep-alive connection is reused
+SESSION = requests.Session()
 
-# Test plot in Brazil (Amazon)
-geojson_template = {
-    "type": "FeatureCollection",
-    "features": [
-        {
-            "type": "Feature",
-            "properties": {"id": 1, "name": "Test Plot"},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-60.0, -3.0],
-                    [-60.0, -3.05],
-                    [-59.95, -3.05],
-                    [-59.95, -3.0],
-                    [-60.0, -3.0]
-                ]]
-            }
+# Open-loop dispatches later than this past their deadline count as late
+DISPATCH_TOLERANCE = 0.01
+
+
+def create_test_feature(test_id):
+    """Create the test plot feature for a test_id, shifted slightly to avoid caching"""
+    offset = test_id * 0.001
+    return {
+        "type": "Feature",
+        "properties": {"id": test_id, "name": "Test Plot"},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[x + offset, y + offset] for x, y in BASE_COORDS]]
         }
-    ]
-}
+    }
+
 
 # Create slight variations to avoid caching
-def create_test_payload(test_id):
-    """Create a test payload with slight variation"""
-    geojson = json.loads(json.dumps(geojson_template))
-    # Slight variation in coordinates to avoid caching
-    offset = test_id * 0.001
-    for coord_set in geojson["features"][0]["geometry"]["coordinates"][0]:
-        coord_set[0] += offset
-        coord_set[1] += offset
+def create_test_payload(test_id, cache_mode=False):
+    """
+    Create a test payload with slight variation
+
+    With cache_mode every caller gets the test_id 0 payload, so repeated
+    requests can be answered from the server's result cache.
+    """
+    if cache_mode:
+        test_id = 0
+
+    return create_batched_payload([test_id])
+
 
-    geojson["features"][0]["properties"]["id"] = test_id
+def create_batched_payload(test_ids):
+    """Create one payload holding a test plot feature per test_id"""
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [create_test_feature(test_id) for test_id in test_ids]
+    }
 
+    # The GeoJSON goes in as an object, so the payload is serialized only once
     return {
         "input_type": "geojson",
-        "input_data": json.dumps(geojson),
+        "input_data": geojson,
         "output_unit": "ha",
         "calculate_risk": True
     }
 
 
-def make_request(test_id, timeout=180):
-    """Make a single API request and return timing data"""
-    payload = create_test_payload(test_id)
+@lru_cache(maxsize=None)
+def _payload_bytes(test_id, cache_mode=False):
+    """Serialized request body for a test_id (the tests reuse the same ids many times)"""
+    return orjson.dumps(create_test_payload(test_id, cache_mode))
+
+
+def make_request(test_id, timeout=180, cache_mode=False):
+    """
+    Make a single API request and return timing data
 
-    start_time = time.time()
+    start_time/end_time come from time.perf_counter() (monotonic), so only
+    differences between them are meaningful.
+    """
+    body = _payload_bytes(test_id, cache_mode)
+
+    start_time = time.perf_counter()
     try:
-        response = requests.post(API_URL, json=payload, timeout=timeout)
-        end_time = time.time()
+        response = SESSION.post(API_URL, data=body, headers=PAYLOAD_HEADERS, timeout=timeout)
+        end_time = time.perf_counter()
 
         elapsed = end_time - start_time
 
@@ -80,92 +119,275 @@ def make_request(test_id, timeout=180):
             'status': 'TIMEOUT',
             'success': False,
             'start_time': start_time,
-            'end_time': time.time()
+            'end_time': time.perf_counter()
+        }
+    except Exception as e:
+        return {
+            'test_id': test_id,
+            'elapsed': time.perf_counter() - start_time,
+            'status': f'ERROR: {str(e)}',
+            'success': False,
+            'start_time': start_time,
+            'end_time': time.perf_counter()
+        }
+
+
+async def make_request_async(client, test_id, timeout=180, cache_mode=False):
+    """Async version of make_request, sending the request on a shared httpx client"""
+    body = _payload_bytes(test_id, cache_mode)
+
+    start_time = time.perf_counter()
+    try:
+        response = await client.post(API_URL, content=body, headers=PAYLOAD_HEADERS, timeout=timeout)
+        end_time = time.perf_counter()
+
+        return {
+            'test_id': test_id,
+            'elapsed': end_time - start_time,
+            'status': response.status_code,
+            'success': response.status_code == 200,
+            'start_time': start_time,
+            'end_time': end_time
+        }
+    except httpx.TimeoutException:
+        return {
+            'test_id': test_id,
+            'elapsed': timeout,
+            'status': 'TIMEOUT',
+            'success': False,
+            'start_time': start_time,
+            'end_time': time.perf_counter()
         }
     except Exception as e:
         return {
             'test_id': test_id,
-            'elapsed': time.time() - start_time,
+            'elapsed': time.perf_counter() - start_time,
             'status': f'ERROR: {str(e)}',
             'success': False,
             'start_time': start_time,
-            'end_time': time.time()
+            'end_time': time.perf_counter()
         }
 
 
+def make_batched_request(test_ids, timeout=180):
+    """Send all test_ids' plots in a single request and return timing data"""
+    body = orjson.dumps(create_batched_payload(test_ids))
+
+    start_time = time.perf_counter()
+    try:
+        response = SESSION.post(API_URL, data=body, headers=PAYLOAD_HEADERS, timeout=timeout)
+        status = response.status_code
+    except requests.exceptions.Timeout:
+        status = 'TIMEOUT'
+    except Exception as e:
+        status = f'ERROR: {str(e)}'
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        'num_features': len(test_ids),
+        'elapsed': elapsed,
+        'status': status,
+        'success': status == 200
+    }
+
+
+class LatencyRecorder:
+    """
+    Online summary of a test's results
+
+    Successful response times go into a histogram with 1 ms buckets, alongside
+    running count/min/max and Welford's running mean and sum of squared
+    deviations (numerically stable, unlike a raw sum of squares). Memory is
+    bounded by the number of distinct millisecond values rather than by the
+    number of requests.
+    """
+
+    def __init__(self):
+        self.hist = Counter()
+        self.total = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.start_time = math.inf
+        self.end_time = -math.inf
+
+    def add(self, result):
+        """Record one result from make_request"""
+        self.total += 1
+        self.start_time = min(self.start_time, result['start_time'])
+        self.end_time = max(self.end_time, result['end_time'])
+        if result['success']:
+            elapsed = result['elapsed']
+            self.hist[int(elapsed * 1000)] += 1
+            self.n += 1
+            delta = elapsed - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (elapsed - self.mean)
+            self.min = min(self.min, elapsed)
+            self.max = max(self.max, elapsed)
+
+    def percentiles(self, ps):
+        """Nearest-rank percentiles (in seconds) from one cumulative scan of the histogram"""
+        pending = sorted(ps)
+        values = {}
+        counted = 0
+        for ms in sorted(self.hist):
+            counted += self.hist[ms]
+            while pending and counted * 100 >= pending[0] * self.n:
+                values[pending.pop(0)] = ms / 1000
+            if not pending:
+                break
+        return [values[p] for p in ps]
+
+
 def run_sequential_test(num_requests):
     """Run requests sequentially"""
     print(f"\nRunning {num_requests} sequential requests...")
-    results = []
+    results = LatencyRecorder()
 
     for i in range(num_requests):
         result = make_request(i)
-        results.append(result)
+        results.add(result)
         status = "✓" if result['success'] else "✗"
         print(f"  Request {i+1}/{num_requests}: {result['elapsed']:.2f}s {status}")
 
     return results
 
 
-def run_concurrent_test(num_requests, max_workers):
-    """Run requests concurrently"""
+async def _open_client(max_workers, http2=False):
+    """
+    Create the httpx client for a concurrent test
+
+    With http2, a single connection is tried first and used to multiplex all
+    requests if the server negotiates HTTP/2; otherwise (e.g. plain uvicorn)
+    this falls back to an HTTP/1.1 pool of max_workers connections.
+    """
+    if http2:
+        client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=1, max_connections=1),
+            timeout=180.0
+        )
+        try:
+            response = await client.get(HEALTH_URL)
+            if response.http_version == "HTTP/2":
+                return client
+        except httpx.HTTPError:
+            pass
+        await client.aclose()
+        print("  Server did not negotiate HTTP/2, using an HTTP/1.1 connection pool")
+
+    limits = httpx.Limits(max_keepalive_connections=max_workers, max_connections=max_workers)
+    return httpx.AsyncClient(limits=limits, timeout=180.0)
+
+
+async def _run_concurrent(num_requests, max_workers, cache_mode=False, http2=False):
+    """Send all requests from one event loop over a shared httpx client"""
+    results = LatencyRecorder()
+    # Timing starts once a request holds a slot, so queueing time is not counted
+    gate = asyncio.Semaphore(max_workers)
+
+    async def gated_request(test_id):
+        async with gate:
+            return await make_request_async(client, test_id, cache_mode=cache_mode)
+
+    async with await _open_client(max_workers, http2) as client:
+        # Collect results as they complete; progress lines are buffered and printed
+        # once all requests are done, so stdout writes don't delay the event loop
+        progress = []
+        for next_result in asyncio.as_completed([gated_request(i) for i in range(num_requests)]):
+            result = await next_result
+            results.add(result)
+            progress.append(result)
+
+    for completed, result in enumerate(progress, 1):
+        status = "✓" if result['success'] else "✗"
+        print(f"  Completed {completed}/{num_requests}: {result['elapsed']:.2f}s {status}")
+
+    return results
+
+
+def run_concurrent_test(num_requests, max_workers, cache_mode=False, http2=False):
+    """Run requests concurrently, with at most max_workers in flight"""
     print(f"\nRunning {num_requests} concurrent requests (max workers: {max_workers})...")
-    results = []
+    return asyncio.run(_run_concurrent(num_requests, max_workers, cache_mode, http2))
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all requests
-        futures = {executor.submit(make_request, i): i for i in range(num_requests)}
 
-        # Collect results as they complete
-        completed = 0
-        for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
-            completed += 1
-            status = "✓" if result['success'] else "✗"
-            print(f"  Completed {completed}/{num_requests}: {result['elapsed']:.2f}s {status}")
+async def _run_open_loop(num_requests, rps):
+    """Dispatch requests on a fixed schedule regardless of how many are in flight"""
+    results = LatencyRecorder()
+    interval = 1.0 / rps
+    timely = 0
+    tasks = []
 
-    return results
+    async with httpx.AsyncClient(timeout=180.0) as client:
+        start = time.perf_counter()
+        for i in range(num_requests):
+            deadline = start + i * interval
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if time.perf_counter() - deadline <= DISPATCH_TOLERANCE:
+                timely += 1
+            tasks.append(asyncio.create_task(make_request_async(client, i)))
+
+        for result in await asyncio.gather(*tasks):
+            results.add(result)
+
+    return results, timely / num_requests
+
+
+def run_open_loop(num_requests, rps):
+    """
+    Run requests open-loop at a target rate
+
+    Unlike run_concurrent_test, new requests don't wait for earlier ones to
+    finish, so latency reflects queueing at the server rather than a cap on
+    client concurrency. Returns the results and the fraction of requests
+    dispatched on time.
+    """
+    print(f"\nRunning {num_requests} requests open-loop at {rps:g} req/s...")
+    results, timely_ratio = asyncio.run(_run_open_loop(num_requests, rps))
+    print(f"  Dispatched on schedule: {timely_ratio * 100:.1f}%")
+    return results, timely_ratio
 
 
 def analyze_results(results, test_name):
     """Analyze and print statistics for results"""
-    if not results:
+    if not results.total:
         print(f"\nNo results for {test_name}")
         return None
 
-    successful = [r for r in results if r['success']]
-    failed = [r for r in results if not r['success']]
-
-    if not successful:
+    if not results.n:
         print(f"\n{test_name}: All requests failed!")
         return None
 
-    times = [r['elapsed'] for r in successful]
+    n = results.n
+    variance = results.m2 / (n - 1) if n > 1 else 0
 
     # Calculate statistics
     stats = {
         'test_name': test_name,
-        'total_requests': len(results),
-        'successful': len(successful),
-        'failed': len(failed),
-        'min_time': min(times),
-        'max_time': max(times),
-        'avg_time': statistics.mean(times),
-        'median_time': statistics.median(times),
-        'stdev_time': statistics.stdev(times) if len(times) > 1 else 0,
-        'total_duration': max(r['end_time'] for r in results) - min(r['start_time'] for r in results),
+        'total_requests': results.total,
+        'successful': n,
+        'failed': results.total - n,
+        'min_time': results.min,
+        'max_time': results.max,
+        'avg_time': results.mean,
+        'stdev_time': math.sqrt(variance),
+        'total_duration': results.end_time - results.start_time,
     }
 
     # Calculate throughput
     stats['throughput'] = stats['successful'] / stats['total_duration'] if stats['total_duration'] > 0 else 0
 
-    # Calculate percentiles
-    sorted_times = sorted(times)
-    stats['p50'] = sorted_times[len(sorted_times) // 2]
-    stats['p90'] = sorted_times[int(len(sorted_times) * 0.9)] if len(sorted_times) > 1 else sorted_times[0]
-    stats['p95'] = sorted_times[int(len(sorted_times) * 0.95)] if len(sorted_times) > 1 else sorted_times[0]
-    stats['p99'] = sorted_times[int(len(sorted_times) * 0.99)] if len(sorted_times) > 1 else sorted_times[0]
+    # Calculate percentiles (1 ms resolution)
+    stats['p50'], stats['p90'], stats['p95'], stats['p99'], stats['p999'] = results.percentiles(
+        [50, 90, 95, 99, 99.9]
+    )
+    stats['median_time'] = stats['p50']
 
     return stats
 
@@ -193,13 +415,14 @@ def print_statistics(stats):
     print(f"  90th:               {stats['p90']:.3f}")
     print(f"  95th:               {stats['p95']:.3f}")
     print(f"  99th:               {stats['p99']:.3f}")
+    print(f"  99.9th:             {stats['p999']:.3f}")
     print(f"\nThroughput:")
     print(f"  Total Duration:     {stats['total_duration']:.2f}s")
     print(f"  Requests/Second:    {stats['throughput']:.2f}")
     print(f"  Time/Request:       {1/stats['throughput']:.2f}s")
 
 
-def main():
+def main(cache_mode=False, rps=None, http2=False):
     """Main load testing function"""
     print("=" * 80)
     print("WHISP API LOAD TEST")
@@ -232,7 +455,7 @@ def main():
     print("\n" + "-" * 80)
     print("TEST 2: Low Concurrency")
     print("-" * 80)
-    results = run_concurrent_test(5, max_workers=2)
+    results = run_concurrent_test(5, max_workers=2, http2=http2)
     stats = analyze_results(results, "Concurrent (5 requests, 2 workers)")
     print_statistics(stats)
     if stats:
@@ -242,7 +465,7 @@ def main():
     print("\n" + "-" * 80)
     print("TEST 3: Medium Concurrency")
     print("-" * 80)
-    results = run_concurrent_test(10, max_workers=5)
+    results = run_concurrent_test(10, max_workers=5, http2=http2)
     stats = analyze_results(results, "Concurrent (10 requests, 5 workers)")
     print_statistics(stats)
     if stats:
@@ -252,7 +475,7 @@ def main():
     print("\n" + "-" * 80)
     print("TEST 4: High Concurrency")
     print("-" * 80)
-    results = run_concurrent_test(10, max_workers=10)
+    results = run_concurrent_test(10, max_workers=MAX_WORKERS, http2=http2)
     stats = analyze_results(results, "Concurrent (10 requests, 10 workers)")
     print_statistics(stats)
     if stats:
@@ -262,11 +485,53 @@ def main():
     print("\n" + "-" * 80)
     print("TEST 5: Stress Test")
     print("-" * 80)
-    results = run_concurrent_test(20, max_workers=10)
+    results = run_concurrent_test(20, max_workers=MAX_WORKERS, http2=http2)
     stats = analyze_results(results, "Stress (20 requests, 10 workers)")
     print_statistics(stats)
     if stats:
         all_stats.append(stats)
+    stress_stats = stats
+
+    # Test 6: Batched (the same 20 plots as Test 5, in one request)
+    print("\n" + "-" * 80)
+    print("TEST 6: Batched Request")
+    print("-" * 80)
+    print("\nSending 1 request with 20 features...")
+    batched = make_batched_request(list(range(20)))
+    if batched['success']:
+        print(f"  Completed in {batched['elapsed']:.2f}s ✓")
+        print(f"\n{'Mode':<40} {'Duration':<12} {'Throughput'}")
+        print("-" * 80)
+        if stress_stats:
+            print(f"{'20 requests x 1 feature (Test 5)':<40} {stress_stats['total_duration']:>9.2f}s  "
+                  f"{stress_stats['successful'] / stress_stats['total_duration']:>10.2f} features/s")
+        print(f"{'1 request x 20 features':<40} {batched['elapsed']:>9.2f}s  "
+              f"{batched['num_features'] / batched['elapsed']:>10.2f} features/s")
+    else:
+        print(f"  Failed after {batched['elapsed']:.2f}s: {batched['status']} ✗")
+
+    # Test 7: Cached path (same load as Test 5, identical payloads)
+    if cache_mode:
+        print("\n" + "-" * 80)
+        print("TEST 7: Cached Path")
+        print("-" * 80)
+        results = run_concurrent_test(20, max_workers=MAX_WORKERS, cache_mode=True, http2=http2)
+        stats = analyze_results(results, "Cached (20 requests, 10 workers)")
+        print_statistics(stats)
+        if stats:
+            all_stats.append(stats)
+
+    # Test 8: Open loop (20 requests at a fixed rate)
+    if rps:
+        print("\n" + "-" * 80)
+        print("TEST 8: Open Loop")
+        print("-" * 80)
+        results, timely_ratio = run_open_loop(20, rps)
+        stats = analyze_results(results, f"Open loop (20 requests, {rps:g} req/s)")
+        print_statistics(stats)
+        if stats:
+            stats['timely_ratio'] = timely_ratio
+            all_stats.append(stats)
 
     # Final comparison
     print("\n" + "=" * 80)
@@ -315,10 +580,40 @@ def main():
         print(f"  - For production, consider implementing a queue system")
         print(f"  - Monitor GEE quota usage for high-volume scenarios")
 
+    # SLO check
+    print("\n" + "=" * 80)
+    print(f"SLO CHECK (p99 < {TARGET_P99_MS} ms)")
+    print("=" * 80)
+    slo_failed = False
+    for s in all_stats:
+        p99_ms = s['p99'] * 1000
+        ok = p99_ms <= TARGET_P99_MS
+        slo_failed = slo_failed or not ok
+        print(f"  {s['test_name']:<40} p99 {p99_ms:>8.0f} ms  {'✓' if ok else '✗'}")
+
     print("\n" + "=" * 80)
     print("Load test complete!")
     print("=" * 80)
 
+    return 1 if slo_failed else 0
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Load test the Whisp API")
+    parser.add_argument(
+        "--cache-mode",
+        action="store_true",
+        help="Add a run that repeats one identical payload, to measure cached throughput"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        help="Add an open-loop run that sends requests at this fixed rate"
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Send concurrent tests over one HTTP/2 connection when the server supports it"
+    )
+    args = parser.parse_args()
+    sys.exit(main(cache_mode=args.cache_mode, rps=args.rps, http2=args.http2))
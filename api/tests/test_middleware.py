@@ -0,0 +1,96 @@
+"""
+Test cases for the FastCORS middleware
+"""
+import pytest
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+
+from app.core.middleware import FastCORS
+
+ORIGIN = "https://example.org"
+
+
+async def echo_app(scope, receive, send):
+    """Minimal ASGI app answering every request with 200 "ok" """
+    response = PlainTextResponse("ok")
+    await response(scope, receive, send)
+
+
+def make_client(**options):
+    """TestClient for echo_app wrapped in FastCORS"""
+    return TestClient(FastCORS(echo_app, **options))
+
+
+def test_preflight_allowed():
+    """Preflight for an allowed method and header is answered directly"""
+    client = make_client(allow_methods=["GET", "POST"], allow_headers=["X-Token"])
+    response = client.options("/analyze", headers={
+        "Origin": ORIGIN,
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "X-Token, Content-Type",
+    })
+    assert response.status_code == 200
+    assert response.text == "OK"
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert response.headers["access-control-allow-methods"] == "GET, POST"
+    assert "x-token" in response.headers["access-control-allow-headers"]
+    assert response.headers["access-control-max-age"] == "600"
+
+
+def test_preflight_disallowed():
+    """Preflight for a method or header that isn't allowed is rejected"""
+    client = make_client(allow_methods=["GET"])
+    response = client.options("/analyze", headers={
+        "Origin": ORIGIN,
+        "Access-Control-Request-Method": "DELETE",
+        "Access-Control-Request-Headers": "X-Token",
+    })
+    assert response.status_code == 400
+    assert response.text == "Disallowed CORS method, headers"
+
+
+def test_simple_request_with_origin():
+    """Simple requests reach the app and get the wildcard origin"""
+    client = make_client()
+    response = client.get("/", headers={"Origin": ORIGIN})
+    assert response.status_code == 200
+    assert response.text == "ok"
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "access-control-allow-credentials" not in response.headers
+
+
+def test_credentialed_request_echoes_origin():
+    """With credentials allowed, a request carrying a cookie gets its origin back"""
+    client = make_client(allow_credentials=True)
+    response = client.get("/", headers={"Origin": ORIGIN, "Cookie": "session=1"})
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["vary"] == "Origin"
+
+
+def test_credentialed_preflight_echoes_origin():
+    """With credentials allowed, preflight responses name the origin instead of "*" """
+    client = make_client(allow_credentials=True, allow_methods=["POST"])
+    response = client.options("/analyze", headers={
+        "Origin": ORIGIN,
+        "Access-Control-Request-Method": "POST",
+    })
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["vary"] == "Origin"
+
+
+def test_request_without_origin_passes_through():
+    """Requests without an Origin header get no CORS headers at all"""
+    client = make_client(allow_credentials=True)
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.text == "ok"
+    assert not any(name.startswith("access-control-") for name in response.headers)
+    assert "vary" not in response.headers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
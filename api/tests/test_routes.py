@@ -0,0 +1,92 @@
+"""
+Test cases for the Whisp API route helpers
+"""
+import time
+
+import pandas as pd
+import pytest
+
+from app.api import routes
+from app.core.config import settings
+
+
+def test_columns_to_dataframe_aligned():
+    """Full-length columns are turned into a DataFrame directly"""
+    data = {"plotId": [1, 2, 3], "Area": [1.0, 2.0, 3.0]}
+    df = routes._columns_to_dataframe(data, 3, fc=None)
+    pd.testing.assert_frame_equal(df, pd.DataFrame(data))
+
+
+def test_columns_to_dataframe_nulls_fall_back(monkeypatch):
+    """Nulls in different rows of different columns use computeFeatures"""
+    expected = pd.DataFrame({
+        "plotId": [1, 2, 3],
+        "Area": [1.0, None, 3.0],
+        "Country": ["BRA", "BRA", None],
+    })
+    calls = []
+
+    def fake_compute_features(params):
+        calls.append(params)
+        return expected
+
+    monkeypatch.setattr(routes.ee.data, "computeFeatures", fake_compute_features)
+    # toList() dropped row 2 of Area and row 3 of Country; both columns are
+    # equally short, so only the feature count reveals the misalignment
+    data = {"plotId": [1, 2, 3], "Area": [1.0, 3.0], "Country": ["BRA", "BRA"]}
+    df = routes._columns_to_dataframe(data, 3, fc="stats_fc")
+
+    assert df is expected
+    assert calls == [{"expression": "stats_fc", "fileFormat": "PANDAS_DATAFRAME"}]
+
+
+def test_columns_to_dataframe_equally_short_columns(monkeypatch):
+    """Columns that are all one short still fall back instead of misaligning"""
+    monkeypatch.setattr(
+        routes.ee.data, "computeFeatures", lambda params: "fallback"
+    )
+    data = {"Area": [1.0, 3.0], "Country": ["BRA", "COL"]}
+    assert routes._columns_to_dataframe(data, 3, fc=None) == "fallback"
+
+
+def test_run_stats_chunks_geojson(monkeypatch):
+    """Inputs above BATCH_THRESHOLD are split client side and reassembled in order"""
+    monkeypatch.setattr(settings, "BATCH_THRESHOLD", 4)
+    monkeypatch.setattr(settings, "N_WORKERS", 3)
+    monkeypatch.setattr(routes.ee, "FeatureCollection", lambda geojson: geojson)
+    features = [{"type": "Feature", "properties": {"id": i}, "geometry": None} for i in range(10)]
+    chunks = []
+
+    def fake_stats_to_dataframe(fc, unit_type, whisp_image):
+        ids = [f["properties"]["id"] for f in fc["features"]]
+        chunks.append(ids)
+        # Earlier chunks finish last, so ordering can't come from completion time
+        time.sleep(0.01 * (10 - ids[0]) / 10)
+        assert (unit_type, whisp_image) == ("ha", "whisp_image")
+        return pd.DataFrame({"id": ids})
+
+    monkeypatch.setattr(routes, "_stats_to_dataframe", fake_stats_to_dataframe)
+    df = routes.run_stats(
+        fc=None, num_features=10, unit_type="ha",
+        whisp_image="whisp_image", geojson_features=features
+    )
+
+    assert sorted(chunks) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert df["id"].tolist() == list(range(10))
+    assert df.index.tolist() == list(range(10))
+
+
+def test_run_stats_below_threshold_single_call(monkeypatch):
+    """Inputs up to BATCH_THRESHOLD are computed in one piece"""
+    monkeypatch.setattr(settings, "BATCH_THRESHOLD", 4)
+    calls = []
+    monkeypatch.setattr(
+        routes, "_stats_to_dataframe",
+        lambda fc, unit_type, whisp_image: calls.append(fc) or pd.DataFrame({"id": [0]})
+    )
+    routes.run_stats("fc", 4, "ha", "whisp_image", geojson_features=[{}] * 4)
+    assert calls == ["fc"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -2,32 +2,16 @@
 Test script to measure API response time for GEE analysis
 """
 import requests
-import json
+import orjson
 import time
 
+from _shared.fixtures import TEMPLATE_DICT, PAYLOAD_HEADERS
+
 # API endpoint
 API_URL = "http://localhost:9006/analyze"
 
-# Small test plot in Brazil
-geojson = {
-    "type": "FeatureCollection",
-    "features": [
-        {
-            "type": "Feature",
-            "properties": {"id": 1, "name": "Test Plot"},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-60.0, -3.0],
-                    [-60.0, -3.05],
-                    [-59.95, -3.05],
-                    [-59.95, -3.0],
-                    [-60.0, -3.0]
-                ]]
-            }
-        }
-    ]
-}
+# Shared session so every request reuses the same keep-alive connection
+SESSION = requests.Session()
 
 # Test configurations
 test_cases = [
@@ -35,7 +19,7 @@ test_cases = [
         "name": "Stats only (no risk)",
         "payload": {
             "input_type": "geojson",
-            "input_data": json.dumps(geojson),
+            "input_data": TEMPLATE_DICT,
             "output_unit": "ha",
             "calculate_risk": False
         }
@@ -44,13 +28,17 @@ test_cases = [
         "name": "Stats + Risk calculation",
         "payload": {
             "input_type": "geojson",
-            "input_data": json.dumps(geojson),
+            "input_data": TEMPLATE_DICT,
             "output_unit": "ha",
             "calculate_risk": True
         }
     }
 ]
 
+# Request bodies are serialized once up front and sent as raw bytes
+for test_case in test_cases:
+    test_case["body"] = orjson.dumps(test_case["payload"])
+
 print("=" * 80)
 print("WHISP API TIMING TEST")
 print("=" * 80)
@@ -59,47 +47,52 @@ print(f"Test Plot Location: Amazon, Brazil")
 print(f"Plot Area: ~3000 hectares")
 print(f"\nRunning timing tests...\n")
 
+# One warm-up call for all test cases (to initialize GEE if needed);
+# if it fails the server is unreachable, so the timed runs are skipped
+print("-" * 80)
+print("Running warm-up call...")
+warmup_ok = True
+try:
+    warmup_start = time.perf_counter()
+    warmup_response = SESSION.post(API_URL, data=test_cases[0]['body'], headers=PAYLOAD_HEADERS, timeout=180)
+    warmup_time = time.perf_counter() - warmup_start
+    print(f"  Warm-up time: {warmup_time:.2f} seconds")
+    print(f"  Status: {warmup_response.status_code}")
+except Exception as e:
+    print(f"  Warm-up failed: {e}")
+    print("  Skipping timed runs")
+    warmup_ok = False
+print()
+
 results_summary = []
 
-for test_case in test_cases:
+for test_case in (test_cases if warmup_ok else []):
     print("-" * 80)
     print(f"Test: {test_case['name']}")
     print("-" * 80)
 
-    # Warm-up call (to initialize GEE if needed)
-    print("Running warm-up call...")
-    try:
-        warmup_start = time.time()
-        warmup_response = requests.post(API_URL, json=test_case['payload'], timeout=180)
-        warmup_time = time.time() - warmup_start
-        print(f"  Warm-up time: {warmup_time:.2f} seconds")
-        print(f"  Status: {warmup_response.status_code}")
-    except Exception as e:
-        print(f"  Warm-up failed: {e}")
-        continue
-
     # Run multiple timed tests
     num_runs = 3
     times = []
 
-    print(f"\nRunning {num_runs} timed requests...")
+    print(f"Running {num_runs} timed requests...")
     for i in range(num_runs):
         try:
             # Record start time
-            start_time = time.time()
+            start_time = time.perf_counter()
 
             # Make request
-            response = requests.post(API_URL, json=test_case['payload'], timeout=180)
+            response = SESSION.post(API_URL, data=test_case['body'], headers=PAYLOAD_HEADERS, timeout=180)
 
             # Record end time
-            end_time = time.time()
+            end_time = time.perf_counter()
             elapsed_time = end_time - start_time
 
             times.append(elapsed_time)
 
             # Check response
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 num_features = result.get('num_features', 'N/A')
                 risk_calc = result.get('risk_calculated', False)
 
@@ -42,6 +42,7 @@ from openforis_whisp.stats import (
     whisp_formatted_stats_ee_to_df,
     whisp_formatted_stats_ee_to_geojson,
     whisp_formatted_stats_geojson_to_df,
+    whisp_formatted_stats_gdf_to_df,
     whisp_formatted_stats_geojson_to_geojson,
     set_point_geometry_area_to_zero,
     convert_iso3_to_iso2,
@@ -65,6 +66,7 @@ from openforis_whisp.reformat import (
 from openforis_whisp.data_conversion import (
     convert_ee_to_df,
     convert_geojson_to_ee,
+    convert_gdf_to_ee,
     convert_df_to_geojson,
     convert_csv_to_geojson,
     convert_ee_to_geojson,
@@ -42,30 +42,21 @@ def convert_geojson_to_ee(
         # Use GeoPandas to read the file and handle CRS
         gdf = gpd.read_file(file_path)
 
-        # NEW: Handle problematic data types before JSON conversion
-        for col in gdf.columns:
-            if col != gdf.geometry.name:  # Skip geometry column
-                # Handle datetime/timestamp columns
-                if pd.api.types.is_datetime64_any_dtype(gdf[col]):
-                    gdf[col] = gdf[col].dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
-                # Handle other problematic types
-                elif gdf[col].dtype == "object":
-                    # Convert any remaining non-serializable objects to strings
-                    gdf[col] = gdf[col].astype(str)
-
-        # Check and convert CRS if needed
-        if enforce_wgs84:
-            if gdf.crs is None:
-                print("Warning: Input GeoJSON has no CRS defined, assuming WGS 84")
-            elif gdf.crs != "EPSG:4326":
-                print(f"Converting CRS from {gdf.crs} to WGS 84 (EPSG:4326)")
-                gdf = gdf.to_crs("EPSG:4326")
-
-        # Convert to GeoJSON
-        geojson_data = json.loads(gdf.to_json())
+        geojson_data = _gdf_to_geojson(gdf, enforce_wgs84)
     else:
         raise ValueError("Input must be a file path (str or Path)")
 
+    return _geojson_to_ee(geojson_data, strip_z_coords, file_path)
+
+
+def _geojson_to_ee(
+    geojson_data: dict, strip_z_coords: bool, source: str
+) -> ee.FeatureCollection:
+    """
+    Validates GeoJSON data and converts it to an Earth Engine FeatureCollection,
+    retrying with Z coordinates stripped if Earth Engine rejects the geometries.
+    source (e.g. the file path) keys the print-once warning messages.
+    """
     validation_errors = validate_geojson(geojson_data)
     if validation_errors:
         raise ValueError(f"GeoJSON validation errors: {validation_errors}")
@@ -79,16 +70,16 @@ def convert_geojson_to_ee(
     except ee.EEException as e:
         if "Invalid GeoJSON geometry" in str(e) and strip_z_coords:
             # Apply print_once deduplication for Z-coordinate stripping messages
-            if not hasattr(convert_geojson_to_ee, "_printed_z_messages"):
-                convert_geojson_to_ee._printed_z_messages = set()
+            if not hasattr(_geojson_to_ee, "_printed_z_messages"):
+                _geojson_to_ee._printed_z_messages = set()
 
-            z_message_key = f"z_coords_{file_path}"
-            if z_message_key not in convert_geojson_to_ee._printed_z_messages:
+            z_message_key = f"z_coords_{source}"
+            if z_message_key not in _geojson_to_ee._printed_z_messages:
                 print(
                     "Warning: Invalid GeoJSON geometry detected, likely due to 3D coordinates."
                 )
                 print("Attempting to fix by stripping Z coordinates...")
-                convert_geojson_to_ee._printed_z_messages.add(z_message_key)
+                _geojson_to_ee._printed_z_messages.add(z_message_key)
 
             # Apply Z-coordinate stripping
             geojson_data_fixed = _strip_z_coordinates_from_geojson(geojson_data)
@@ -99,10 +90,10 @@ def convert_geojson_to_ee(
                     create_feature_collection(geojson_data_fixed)
                 )
 
-                success_message_key = f"z_coords_success_{file_path}"
-                if success_message_key not in convert_geojson_to_ee._printed_z_messages:
+                success_message_key = f"z_coords_success_{source}"
+                if success_message_key not in _geojson_to_ee._printed_z_messages:
                     print("✓ Successfully converted after stripping Z coordinates")
-                    convert_geojson_to_ee._printed_z_messages.add(success_message_key)
+                    _geojson_to_ee._printed_z_messages.add(success_message_key)
 
                 return feature_collection
             except Exception as retry_error:
@@ -113,6 +104,57 @@ def convert_geojson_to_ee(
             raise e
 
 
+def _gdf_to_geojson(gdf: gpd.GeoDataFrame, enforce_wgs84: bool = True) -> dict:
+    """
+    Converts a GeoDataFrame to a GeoJSON dict that Earth Engine accepts:
+    datetime/object columns are turned into strings and the CRS is optionally
+    converted to WGS 84. Column types are converted in place, so pass a copy
+    if the GeoDataFrame is still needed.
+    """
+    # Handle problematic data types before JSON conversion
+    for col in gdf.columns:
+        if col != gdf.geometry.name:  # Skip geometry column
+            # Handle datetime/timestamp columns
+            if pd.api.types.is_datetime64_any_dtype(gdf[col]):
+                gdf[col] = gdf[col].dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+            # Handle other problematic types
+            elif gdf[col].dtype == "object":
+                # Convert any remaining non-serializable objects to strings
+                gdf[col] = gdf[col].astype(str)
+
+    # Check and convert CRS if needed
+    if enforce_wgs84:
+        if gdf.crs is None:
+            print("Warning: Input GeoJSON has no CRS defined, assuming WGS 84")
+        elif gdf.crs != "EPSG:4326":
+            print(f"Converting CRS from {gdf.crs} to WGS 84 (EPSG:4326)")
+            gdf = gdf.to_crs("EPSG:4326")
+
+    # Convert to GeoJSON
+    return json.loads(gdf.to_json())
+
+
+def convert_gdf_to_ee(
+    gdf: gpd.GeoDataFrame, enforce_wgs84: bool = True, strip_z_coords: bool = True
+) -> ee.FeatureCollection:
+    """
+    Converts an in-memory GeoDataFrame to an Earth Engine FeatureCollection.
+    Same conversion as convert_geojson_to_ee, without reading a file, so callers
+    can load the data once (e.g. with pyogrio) and reuse it.
+
+    Args:
+        gdf (gpd.GeoDataFrame): The features to convert.
+        enforce_wgs84 (bool): Whether to enforce WGS 84 projection (EPSG:4326). Defaults to True.
+        strip_z_coords (bool): Whether to automatically strip Z coordinates from 3D geometries. Defaults to True.
+
+    Returns:
+        ee.FeatureCollection: Earth Engine FeatureCollection created from the GeoDataFrame.
+    """
+    # Copy so the caller's GeoDataFrame keeps its column types
+    geojson_data = _gdf_to_geojson(gdf.copy(), enforce_wgs84)
+    return _geojson_to_ee(geojson_data, strip_z_coords, "GeoDataFrame")
+
+
 def _strip_z_coordinates_from_geojson(geojson_data: dict) -> dict:
     """
     Helper function to strip Z coordinates from GeoJSON data.
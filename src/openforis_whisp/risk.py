@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from .pd_schemas import data_lookup_type
@@ -153,66 +154,51 @@ def whisp_risk(
     unit_type = detect_unit_type(df, explicit_unit_type)
     print(f"Using unit type: {unit_type}")
 
-    lookup_df_copy = lookup_gee_datasets_df.copy()
+    if custom_bands_info or national_codes:
+        lookup_df_copy = lookup_gee_datasets_df.copy()
 
-    # Add custom bands to lookup if provided
-    if custom_bands_info:
-        lookup_df_copy = add_custom_bands_info_to_lookup(
-            lookup_df_copy, custom_bands_info, df.columns
+        # Add custom bands to lookup if provided
+        if custom_bands_info:
+            lookup_df_copy = add_custom_bands_info_to_lookup(
+                lookup_df_copy, custom_bands_info, df.columns
+            )
+            print(f"Including custom bands: {list(custom_bands_info.keys())}")
+        if national_codes:
+            print(f"Including additional national data for: {national_codes}")
+        # Filter by national codes
+        filtered_lookup_gee_datasets_df = filter_lookup_by_country_codes(
+            lookup_df=lookup_df_copy,
+            filter_col="ISO2_code",
+            national_codes=national_codes,
         )
-        print(f"Including custom bands: {list(custom_bands_info.keys())}")
-    if national_codes:
-        print(f"Including additional national data for: {national_codes}")
-    # Filter by national codes
-    filtered_lookup_gee_datasets_df = filter_lookup_by_country_codes(
-        lookup_df=lookup_df_copy,
-        filter_col="ISO2_code",
-        national_codes=national_codes,
-    )
+        default_input_columns = get_ind_input_columns(filtered_lookup_gee_datasets_df)
+    else:
+        # Global datasets only: reuse the lists computed at import
+        default_input_columns = DEFAULT_IND_INPUT_COLUMNS
 
     # Get indicator columns (now includes custom bands)
     if ind_1_input_columns is None:
-        ind_1_input_columns = get_cols_ind_01_treecover(filtered_lookup_gee_datasets_df)
+        ind_1_input_columns = default_input_columns[0]
     if ind_2_input_columns is None:
-        ind_2_input_columns = get_cols_ind_02_commodities(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_2_input_columns = default_input_columns[1]
     if ind_3_input_columns is None:
-        ind_3_input_columns = get_cols_ind_03_dist_before_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_3_input_columns = default_input_columns[2]
     if ind_4_input_columns is None:
-        ind_4_input_columns = get_cols_ind_04_dist_after_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_4_input_columns = default_input_columns[3]
     if ind_5_input_columns is None:
-        ind_5_input_columns = get_cols_ind_05_primary_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_5_input_columns = default_input_columns[4]
     if ind_6_input_columns is None:
-        ind_6_input_columns = get_cols_ind_06_nat_reg_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_6_input_columns = default_input_columns[5]
     if ind_7_input_columns is None:
-        ind_7_input_columns = get_cols_ind_07_planted_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_7_input_columns = default_input_columns[6]
     if ind_8_input_columns is None:
-        ind_8_input_columns = get_cols_ind_08_planted_after_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_8_input_columns = default_input_columns[7]
     if ind_9_input_columns is None:
-        ind_9_input_columns = get_cols_ind_09_treecover_after_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_9_input_columns = default_input_columns[8]
     if ind_10_input_columns is None:
-        ind_10_input_columns = get_cols_ind_10_agri_after_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_10_input_columns = default_input_columns[9]
     if ind_11_input_columns is None:
-        ind_11_input_columns = get_cols_ind_11_logging_before_2020(
-            filtered_lookup_gee_datasets_df
-        )
+        ind_11_input_columns = default_input_columns[10]
 
     # Check range of values
     check_range(ind_1_pcent_threshold)
@@ -278,35 +264,27 @@ def whisp_risk(
         unit_type,  # Pass the unit type
     )
 
-    df_w_indicators_and_risk_pcrop = add_eudr_risk_pcrop_col(
-        df=df_w_indicators,
-        ind_1_name=ind_1_name,
-        ind_2_name=ind_2_name,
-        ind_3_name=ind_3_name,
-        ind_4_name=ind_4_name,
-    )
-
-    df_w_indicators_and_risk_acrop = add_eudr_risk_acrop_col(
-        df=df_w_indicators,
-        ind_1_name=ind_1_name,
-        ind_2_name=ind_2_name,
-        ind_4_name=ind_4_name,
-    )
-
-    df_w_indicators_and_risk_timber = add_eudr_risk_timber_col(
-        df=df_w_indicators,
-        ind_2_name=ind_2_name,
-        ind_5_name=ind_5_name,
-        ind_6_name=ind_6_name,
-        ind_7_name=ind_7_name,
-        ind_8_name=ind_8_name,
-        ind_9_name=ind_9_name,
-        ind_10_name=ind_10_name,
-        ind_11_name=ind_11_name,
+    # All three risk columns are computed first and added in a single assign
+    return df_w_indicators.assign(
+        risk_pcrop=_risk_pcrop_values(
+            df_w_indicators, ind_1_name, ind_2_name, ind_3_name, ind_4_name
+        ),
+        risk_acrop=_risk_acrop_values(
+            df_w_indicators, ind_1_name, ind_2_name, ind_4_name
+        ),
+        risk_timber=_risk_timber_values(
+            df_w_indicators,
+            ind_2_name,
+            ind_5_name,
+            ind_6_name,
+            ind_7_name,
+            ind_8_name,
+            ind_9_name,
+            ind_10_name,
+            ind_11_name,
+        ),
     )
 
-    return df_w_indicators_and_risk_timber
-
 
 def add_eudr_risk_pcrop_col(
     df: data_lookup_type,
@@ -328,23 +306,36 @@ def add_eudr_risk_pcrop_col(
     Returns:
         DataFrame: DataFrame with added 'EUDR_risk' column.
     """
+    df["risk_pcrop"] = _risk_pcrop_values(
+        df, ind_1_name, ind_2_name, ind_3_name, ind_4_name
+    )
+    return df
 
-    for index, row in df.iterrows():
-        # If any of the first three indicators suggest low risk, set EUDR_risk to "low"
-        if (
-            row[ind_1_name] == "no"
-            or row[ind_2_name] == "yes"
-            or row[ind_3_name] == "yes"
-        ):
-            df.at[index, "risk_pcrop"] = "low"
-        # If none of the first three indicators suggest low risk and Indicator 4 suggests no risk, set EUDR_risk to "more_info_needed"
-        elif row[ind_4_name] == "no":
-            df.at[index, "risk_pcrop"] = "more_info_needed"
-        # If none of the above conditions are met, set EUDR_risk to "high"
-        else:
-            df.at[index, "risk_pcrop"] = "high"
 
-    return df
+def _risk_pcrop_values(
+    df: data_lookup_type,
+    ind_1_name: str,
+    ind_2_name: str,
+    ind_3_name: str,
+    ind_4_name: str,
+) -> np.ndarray:
+    """Values of the risk_pcrop column (see add_eudr_risk_pcrop_col), one per row of df."""
+    ind_1_no = df[ind_1_name].to_numpy() == "no"
+    ind_2_yes = df[ind_2_name].to_numpy() == "yes"
+    ind_3_yes = df[ind_3_name].to_numpy() == "yes"
+    ind_4_no = df[ind_4_name].to_numpy() == "no"
+
+    return np.select(
+        [
+            # If any of the first three indicators suggest low risk, set EUDR_risk to "low"
+            ind_1_no | ind_2_yes | ind_3_yes,
+            # If none of the first three indicators suggest low risk and Indicator 4 suggests no risk, set EUDR_risk to "more_info_needed"
+            ind_4_no,
+        ],
+        ["low", "more_info_needed"],
+        # If none of the above conditions are met, set EUDR_risk to "high"
+        default="high",
+    )
 
 
 def add_eudr_risk_acrop_col(
@@ -365,20 +356,33 @@ def add_eudr_risk_acrop_col(
     Returns:
         DataFrame: DataFrame with added 'EUDR_risk' column.
     """
+    df["risk_acrop"] = _risk_acrop_values(df, ind_1_name, ind_2_name, ind_4_name)
+    return df
+
 
+def _risk_acrop_values(
+    df: data_lookup_type,
+    ind_1_name: str,
+    ind_2_name: str,
+    ind_4_name: str,
+) -> np.ndarray:
+    """Values of the risk_acrop column (see add_eudr_risk_acrop_col), one per row of df."""
     # soy risk
-    for index, row in df.iterrows():
-        # If there is no tree cover in 2020, set EUDR_risk_soy to "low"
-        if row[ind_1_name] == "no" or row[ind_2_name] == "yes":
-            df.at[index, "risk_acrop"] = "low"
-        # If there is tree cover in 2020 and distrubances post 2020, set EUDR_risk_soy to "high"
-        elif row[ind_1_name] == "yes" and row[ind_4_name] == "yes":
-            df.at[index, "risk_acrop"] = "high"
+    ind_1 = df[ind_1_name].to_numpy()
+    ind_2_yes = df[ind_2_name].to_numpy() == "yes"
+    ind_4_yes = df[ind_4_name].to_numpy() == "yes"
+
+    return np.select(
+        [
+            # If there is no tree cover in 2020, set EUDR_risk_soy to "low"
+            (ind_1 == "no") | ind_2_yes,
+            # If there is tree cover in 2020 and distrubances post 2020, set EUDR_risk_soy to "high"
+            (ind_1 == "yes") & ind_4_yes,
+        ],
+        ["low", "high"],
         # If tree cover and no disturbances post 2020, set EUDR_risk to "more_info_needed"
-        else:
-            df.at[index, "risk_acrop"] = "more_info_needed"
-
-    return df
+        default="more_info_needed",
+    )
 
 
 def add_eudr_risk_timber_col(
@@ -409,44 +413,64 @@ def add_eudr_risk_timber_col(
     Returns:
         DataFrame: DataFrame with added 'EUDR_risk' column.
     """
+    df["risk_timber"] = _risk_timber_values(
+        df,
+        ind_2_name,
+        ind_5_name,
+        ind_6_name,
+        ind_7_name,
+        ind_8_name,
+        ind_9_name,
+        ind_10_name,
+        ind_11_name,
+    )
+    return df
 
-    for index, row in df.iterrows():
-        # If there is a commodity in 2020 (ind_2_name)
-        # OR if there is planted-plantation in 2020 (ind_7_name) AND no agriculture in 2023 (ind_10_name), set EUDR_risk_timber to "low"
-        if row[ind_2_name] == "yes" or (
-            row[ind_7_name] == "yes" and row[ind_10_name] == "no"
-        ):
-            df.at[index, "risk_timber"] = "low"
-        # If there is a natural forest primary (ind_5_name) or naturally regenerating (ind_6_name) or planted forest (ind_7_name) in 2020 AND agricultural after 2020 (ind_10_name), set EUDR_timber to high
-        elif (
-            row[ind_5_name] == "yes"
-            or row[ind_6_name] == "yes"
-            or row[ind_7_name] == "yes"
-        ) and row[ind_10_name] == "yes":
-            df.at[index, "risk_timber"] = "high"
-        # If there is a natural forest primary (ind_5_name) or naturally regenerating (ind_6_name) AND planted after 2020 (ind_8_name), set EUDR_risk to "high"
-        elif (row[ind_5_name] == "yes" or row[ind_6_name] == "yes") and row[
-            ind_8_name
-        ] == "yes":
-            df.at[index, "risk_timber"] = "high"
-        # No data yet on OWL conversion
-        # If primary or naturally regenerating or planted forest in 2020 and OWL in 2023, set EUDR_risk to high
-        # elif (row[ind_5_name] == "yes" or row[ind_6_name] == "yes" or row[ind_7_name] == "yes") and row[ind_10_name] == "yes":
-        #    df.at[index, 'EUDR_risk_timber'] = "high"
-
-        # If there is a natural primary forest (ind_5_name) OR naturally regenerating in 2020 (ind_6_name) AND an information on management practice any time (ind_11_name) OR tree cover or regrowth post 2020 (ind_9_name), set EUDR_risk_timber to "low"
-        elif (row[ind_5_name] == "yes" or row[ind_6_name] == "yes") and (
-            row[ind_9_name] == "yes" or row[ind_11_name] == "yes"
-        ):
-            df.at[index, "risk_timber"] = "low"
-        # If primary (ind_5_name) OR naturally regenerating in 2020 (ind_6_name) and no other info, set EUDR_risk to "more_info_needed"
-        elif row[ind_5_name] == "yes" or row[ind_6_name] == "yes":
-            df.at[index, "risk_timber"] = "more_info_needed"
-        # If none of the above conditions are met, set EUDR_risk to "low"
-        else:
-            df.at[index, "risk_timber"] = "low"
 
-    return df
+def _risk_timber_values(
+    df: data_lookup_type,
+    ind_2_name: str,
+    ind_5_name: str,
+    ind_6_name: str,
+    ind_7_name: str,
+    ind_8_name: str,
+    ind_9_name: str,
+    ind_10_name: str,
+    ind_11_name: str,
+) -> np.ndarray:
+    """Values of the risk_timber column (see add_eudr_risk_timber_col), one per row of df."""
+    ind_2_yes = df[ind_2_name].to_numpy() == "yes"
+    ind_5_yes = df[ind_5_name].to_numpy() == "yes"
+    ind_6_yes = df[ind_6_name].to_numpy() == "yes"
+    ind_7_yes = df[ind_7_name].to_numpy() == "yes"
+    ind_8_yes = df[ind_8_name].to_numpy() == "yes"
+    ind_9_yes = df[ind_9_name].to_numpy() == "yes"
+    ind_10 = df[ind_10_name].to_numpy()
+    ind_11_yes = df[ind_11_name].to_numpy() == "yes"
+
+    natural_2020 = ind_5_yes | ind_6_yes
+
+    # Conditions are checked in order; the first one that matches wins
+    return np.select(
+        [
+            # If there is a commodity in 2020 (ind_2_name)
+            # OR if there is planted-plantation in 2020 (ind_7_name) AND no agriculture in 2023 (ind_10_name), set EUDR_risk_timber to "low"
+            ind_2_yes | (ind_7_yes & (ind_10 == "no")),
+            # If there is a natural forest primary (ind_5_name) or naturally regenerating (ind_6_name) or planted forest (ind_7_name) in 2020 AND agricultural after 2020 (ind_10_name), set EUDR_timber to high
+            (natural_2020 | ind_7_yes) & (ind_10 == "yes"),
+            # If there is a natural forest primary (ind_5_name) or naturally regenerating (ind_6_name) AND planted after 2020 (ind_8_name), set EUDR_risk to "high"
+            natural_2020 & ind_8_yes,
+            # No data yet on OWL conversion
+            # If primary or naturally regenerating or planted forest in 2020 and OWL in 2023, set EUDR_risk to high
+            # If there is a natural primary forest (ind_5_name) OR naturally regenerating in 2020 (ind_6_name) AND an information on management practice any time (ind_11_name) OR tree cover or regrowth post 2020 (ind_9_name), set EUDR_risk_timber to "low"
+            natural_2020 & (ind_9_yes | ind_11_yes),
+            # If primary (ind_5_name) OR naturally regenerating in 2020 (ind_6_name) and no other info, set EUDR_risk to "more_info_needed"
+            natural_2020,
+        ],
+        ["low", "high", "high", "low", "more_info_needed"],
+        # If none of the above conditions are met, set EUDR_risk to "low"
+        default="low",
+    )
 
 
 def add_indicators(
@@ -846,3 +870,43 @@ def add_custom_bands_info_to_lookup(
         lookup_df = pd.concat([lookup_df, custom_df], ignore_index=True)
 
     return lookup_df
+
+
+def get_ind_input_columns(lookup_gee_datasets_df):
+    """
+    Input columns of the 11 indicators, in order (ind_1 to ind_11), for a lookup table.
+
+    Args:
+    lookup_gee_datasets_df (pd.DataFrame): DataFrame containing dataset information.
+
+    Returns:
+    tuple: One list of dataset names per indicator.
+    """
+    return tuple(
+        get_cols(lookup_gee_datasets_df)
+        for get_cols in (
+            get_cols_ind_01_treecover,
+            get_cols_ind_02_commodities,
+            get_cols_ind_03_dist_before_2020,
+            get_cols_ind_04_dist_after_2020,
+            get_cols_ind_05_primary_2020,
+            get_cols_ind_06_nat_reg_2020,
+            get_cols_ind_07_planted_2020,
+            get_cols_ind_08_planted_after_2020,
+            get_cols_ind_09_treecover_after_2020,
+            get_cols_ind_10_agri_after_2020,
+            get_cols_ind_11_logging_before_2020,
+        )
+    )
+
+
+# Indicator input columns for the default case (global datasets, no custom bands).
+# Computed once at import, like CURRENT_YEAR in datasets.py, instead of filtering
+# the lookup table again on every whisp_risk call.
+DEFAULT_IND_INPUT_COLUMNS = get_ind_input_columns(
+    filter_lookup_by_country_codes(
+        lookup_df=lookup_gee_datasets_df,
+        filter_col="ISO2_code",
+        national_codes=None,
+    )
+)
@@ -23,6 +23,7 @@ from openforis_whisp.parameters.config_runtime import (
 from .data_conversion import (
     convert_ee_to_df,
     convert_geojson_to_ee,
+    convert_gdf_to_ee,
     convert_ee_to_geojson,
     # convert_csv_to_geojson,
     convert_df_to_geojson,
@@ -145,6 +146,43 @@ def whisp_formatted_stats_geojson_to_df(
     )
 
 
+def whisp_formatted_stats_gdf_to_df(
+    gdf,
+    external_id_column=None,
+    remove_geom=False,
+    national_codes=None,
+    unit_type="ha",
+    whisp_image=None,
+    custom_bands=None,
+) -> pd.DataFrame:
+    """
+    Same as whisp_formatted_stats_geojson_to_df, but takes an already loaded
+    GeoDataFrame (e.g. from pyogrio.read_dataframe) instead of a file path.
+
+    Parameters
+    ----------
+    gdf : geopandas.GeoDataFrame
+        The features of the ROI to analyze.
+    Other parameters are as in whisp_formatted_stats_geojson_to_df.
+
+    Returns
+    -------
+    df_stats : pd.DataFrame
+        The DataFrame containing the Whisp stats for the input ROI.
+    """
+    feature_collection = convert_gdf_to_ee(gdf)
+
+    return whisp_formatted_stats_ee_to_df(
+        feature_collection,
+        external_id_column,
+        remove_geom,
+        national_codes=national_codes,
+        unit_type=unit_type,
+        whisp_image=whisp_image,
+        custom_bands=custom_bands,
+    )
+
+
 def whisp_formatted_stats_geojson_to_geojson(
     input_geojson_filepath,
     output_geojson_filepath,
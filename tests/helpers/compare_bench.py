@@ -0,0 +1,58 @@
+"""
+Compare two benchmark summaries written by test_performance_benchmark.run_all_benchmarks.
+
+Usage:
+    python tests/helpers/compare_bench.py baseline.json current.json [--threshold 0.1]
+
+Exits with status 1 if any timing present in both files is more than
+threshold (default 10%) slower in current than in baseline.
+"""
+import argparse
+import json
+import sys
+
+
+def load_timings(path):
+    """Numeric timings (seconds) from a bench_results.json file; counts are stored apart."""
+    with open(path) as f:
+        timings = json.load(f)["timings"]
+    return {
+        name: value for name, value in timings.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print a comparison table and return the names of regressed timings."""
+    regressions = []
+    print(f"{'metric':<28} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(baseline.keys() & current.keys()):
+        base, cur = baseline[name], current[name]
+        change = (cur - base) / base if base else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        flag = "  ⚠ REGRESSION" if regressed else ""
+        print(f"{name:<28} {base:>12.4f} {cur:>12.4f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline", help="bench_results.json to compare against")
+    parser.add_argument("current", help="bench_results.json of the run under test")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Allowed relative slowdown per timing (default: 0.1 = 10%%)")
+    args = parser.parse_args()
+
+    regressions = compare(load_timings(args.baseline), load_timings(args.current), args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} timing(s) regressed by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
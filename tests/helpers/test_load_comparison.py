@@ -9,6 +9,7 @@ import sys
 import shutil
 import os
 from pathlib import Path
+from functools import lru_cache
 import json
 from dotenv import load_dotenv
 
@@ -39,6 +40,10 @@ ORIGINAL_DIR = Path("/tmp/whisp_original_checkout")
 ORIGINAL_SRC_DIR = ORIGINAL_DIR / "src"
 TEST_GEOJSON = REPO_ROOT / "tests" / "fixtures" / "geojson_example.geojson"
 
+# Parsed once; subsets are sliced from this copy
+with open(TEST_GEOJSON, 'r') as f:
+    _FIXTURE = json.load(f)
+
 
 def setup_original_code():
     """Verify original code is available."""
@@ -51,13 +56,11 @@ def setup_original_code():
     print(f"  ✓ Original code available at {ORIGINAL_DIR}\n")
 
 
+@lru_cache(maxsize=None)
 def load_geojson_subset(n_features):
-    """Load a subset of features from the test GeoJSON."""
-    with open(TEST_GEOJSON, 'r') as f:
-        data = json.load(f)
-
+    """Write a subset of features from the test GeoJSON to a temp file (once per size)."""
     # Limit features
-    data['features'] = data['features'][:n_features]
+    data = dict(_FIXTURE, features=_FIXTURE['features'][:n_features])
 
     # Write to temp file
     temp_file = Path(f"/tmp/test_{n_features}_features.geojson")
@@ -67,96 +70,62 @@ def load_geojson_subset(n_features):
     return temp_file
 
 
-def test_original_code(n_features):
-    """Test the original (unoptimized) code."""
-    # Add original code to Python path
-    if str(ORIGINAL_SRC_DIR) not in sys.path:
-        sys.path.insert(0, str(ORIGINAL_SRC_DIR))
+def _drop_whisp_modules():
+    """Remove every openforis_whisp module from sys.modules."""
+    for module in list(sys.modules.keys()):
+        if module == 'openforis_whisp' or module.startswith('openforis_whisp.'):
+            del sys.modules[module]
 
-    # Import from original
-    try:
-        import importlib
-        # Remove any cached modules
-        for module in list(sys.modules.keys()):
-            if 'openforis_whisp' in module:
-                del sys.modules[module]
 
+def import_whisp(src_dir):
+    """
+    Import one version of openforis_whisp from src_dir.
+
+    The package uses absolute imports, so each version is imported under its
+    real name with src_dir first on sys.path, then taken out of sys.modules so
+    the other version can be imported the same way. The returned functions keep
+    their own module globals, so each version is only imported once per run.
+    """
+    _drop_whisp_modules()
+    sys.path.insert(0, str(src_dir))
+    try:
         from openforis_whisp.stats import whisp_formatted_stats_geojson_to_df
         from openforis_whisp.risk import whisp_risk
+    finally:
+        sys.path.remove(str(src_dir))
+        _drop_whisp_modules()
 
-        # Load test data
-        geojson_file = load_geojson_subset(n_features)
+    return whisp_formatted_stats_geojson_to_df, whisp_risk
 
-        # Time the operation
-        start = time.time()
-
-        df_stats = whisp_formatted_stats_geojson_to_df(
-            geojson_file,
-            unit_type="ha"
-        )
-        df_with_risk = whisp_risk(df_stats)
-
-        elapsed = time.time() - start
-
-        # Cleanup
-        if str(ORIGINAL_SRC_DIR) in sys.path:
-            sys.path.remove(str(ORIGINAL_SRC_DIR))
-
-        return {
-            'n_features': n_features,
-            'time': elapsed,
-            'features_processed': len(df_with_risk),
-            'version': 'original'
-        }
-
-    except Exception as e:
-        print(f"  ✗ Error testing original code: {e}")
-        import traceback
-        traceback.print_exc()
-        if str(ORIGINAL_SRC_DIR) in sys.path:
-            sys.path.remove(str(ORIGINAL_SRC_DIR))
-        return None
-
-
-def test_optimized_code(n_features):
-    """Test the optimized (current) code."""
-    # Add current code to Python path
-    if str(SRC_DIR) not in sys.path:
-        sys.path.insert(0, str(SRC_DIR))
 
+def _run(fn_stats, fn_risk, n_features, label):
+    """Time stats + risk on n_features with one version's pre-imported functions."""
     try:
-        import importlib
-        # Remove any cached modules
-        for module in list(sys.modules.keys()):
-            if 'openforis_whisp' in module:
-                del sys.modules[module]
-
-        from openforis_whisp.stats import whisp_formatted_stats_geojson_to_df
-        from openforis_whisp.risk import whisp_risk
-
         # Load test data
         geojson_file = load_geojson_subset(n_features)
 
         # Time the operation
-        start = time.time()
+        start = time.perf_counter()
 
-        df_stats = whisp_formatted_stats_geojson_to_df(
+        df_stats = fn_stats(
             geojson_file,
             unit_type="ha"
         )
-        df_with_risk = whisp_risk(df_stats)
+        df_with_risk = fn_risk(df_stats)
 
-        elapsed = time.time() - start
+        elapsed = time.perf_counter() - start
 
         return {
             'n_features': n_features,
             'time': elapsed,
             'features_processed': len(df_with_risk),
-            'version': 'optimized'
+            'version': label
         }
 
     except Exception as e:
-        print(f"  ✗ Error testing optimized code: {e}")
+        print(f"  ✗ Error testing {label} code: {e}")
+        import traceback
+        traceback.print_exc()
         return None
 
 
@@ -169,6 +138,8 @@ def run_load_tests():
 
     # Setup
     setup_original_code()
+    original_fns = import_whisp(ORIGINAL_SRC_DIR)
+    optimized_fns = import_whisp(SRC_DIR)
 
     # Test with different feature counts
     test_sizes = [1, 5, 10, 20, 36]
@@ -180,7 +151,7 @@ def run_load_tests():
 
         # Test original
         print(f"  Running ORIGINAL code with {n} features...")
-        result_orig = test_original_code(n)
+        result_orig = _run(*original_fns, n, 'original')
         if result_orig:
             print(f"    ✓ Time: {result_orig['time']:.2f}s")
             results.append(result_orig)
@@ -190,7 +161,7 @@ def run_load_tests():
 
         # Test optimized
         print(f"  Running OPTIMIZED code with {n} features...")
-        result_opt = test_optimized_code(n)
+        result_opt = _run(*optimized_fns, n, 'optimized')
         if result_opt:
             print(f"    ✓ Time: {result_opt['time']:.2f}s")
             results.append(result_opt)
@@ -3,55 +3,266 @@ Performance benchmark for Google Earth Engine optimizations.
 
 This test measures the time taken for key operations that were optimized
 to remove slow .getInfo() calls.
+
+Tests that call Earth Engine are marked integration and only run with
+WHISP_RUN_INTEGRATION=1 (and EE credentials); the 3600-feature stats scaling
+case also needs WHISP_BENCH_LARGE=1.
+
+Under pytest, combine_datasets is measured with pytest-benchmark
+(pip install pytest-benchmark; skipped if missing). Save a baseline with
+--benchmark-autosave and gate regressions with
+--benchmark-compare --benchmark-compare-fail=median:10%.
+Run as a script for the hand-rolled summary report (run_all_benchmarks).
 """
 import time
+import hashlib
+import json
+import pickle
+import platform
+from contextlib import contextmanager
+import resource
+import statistics
+import multiprocessing
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import os
 from dotenv import load_dotenv
 
 import ee
+import pytest
 
-# Load environment variables from .env file
-env_path = Path(__file__).parents[2] / ".env"
-load_dotenv(env_path)
+try:
+    import pytest_benchmark
+except ImportError:
+    pytest_benchmark = None
 
-# Initialize Earth Engine with project from .env
-project = os.getenv("PROJECT")
+# Optional: only the NDJSON dump and the streamed memory benchmark need these
 try:
-    if project:
-        ee.Initialize(project=project)
-        print(f"✓ Earth Engine initialized successfully with project: {project}")
-    else:
-        ee.Initialize()
-        print("✓ Earth Engine initialized successfully")
-except Exception as e:
-    print(f"⚠ Warning: Could not initialize Earth Engine: {e}")
-    print("  Make sure you've run: earthengine authenticate")
-    print("  And set PROJECT in your .env file")
-
-from openforis_whisp.stats import whisp_formatted_stats_geojson_to_df
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# .env holding PROJECT; read by the ee_session fixture, which initializes EE
+# against that project and the high-volume endpoint. Importing openforis_whisp
+# (here and in tests/conftest.py) still runs its default ee.Initialize().
+env_path = Path(__file__).parents[2] / ".env"
+
+# High-volume EE endpoint, meant for automated, concurrent requests like the ones below
+EE_HIGH_VOLUME_URL = "https://earthengine-highvolume.googleapis.com"
+
+from openforis_whisp.stats import whisp_formatted_stats_gdf_to_df
 from openforis_whisp.risk import whisp_risk
 from openforis_whisp.datasets import combine_datasets
+from openforis_whisp.parameters.config_runtime import plot_id_column
 
+import geopandas as gpd
 import pandas as pd
+import pyogrio
 
 
 GEOJSON_EXAMPLE_FILEPATH = (
     Path(__file__).parents[1] / "fixtures" / "geojson_example.geojson"
 )
 
+# Timings of the slow combine_datasets(validate_bands=True) call, keyed by
+# (git commit, validate_bands). Set WHISP_BENCH_FORCE=1 (or pass --force) to re-measure.
+BENCH_CACHE_PATH = Path.home() / ".cache" / "whisp" / "bench.pkl"
+FORCE_BENCH = os.getenv("WHISP_BENCH_FORCE") == "1"
+
+
+# Machine-readable summary written by run_all_benchmarks; compare two of them
+# with tests/helpers/compare_bench.py
+BENCH_RESULTS_PATH = Path(os.getenv("WHISP_BENCH_RESULTS", "bench_results.json"))
+
+# Number of timed runs per measurement
+BENCH_REPEAT = int(os.getenv("WHISP_BENCH_REPEAT", "5"))
+
+# Worker processes for the parallel stats run in test_full_workflow_performance
+STATS_WORKERS = int(os.getenv("WHISP_BENCH_WORKERS", "8"))
+
+# Most EE round trips (ee.data.computeValue calls) one stats run may make
+MAX_STATS_ROUND_TRIPS = 2
+
+# Tests that hit Earth Engine are marked integration and skipped unless
+# WHISP_RUN_INTEGRATION=1, so the default pytest run stays offline
+RUN_INTEGRATION = os.getenv("WHISP_RUN_INTEGRATION") == "1"
+
+# Copies of the fixture features fed to the stats step in test_stats_scaling_performance,
+# and how much the time per feature at the largest size may exceed that at 1 copy.
+# The 100-copy case sends 3600 features to EE, so it only runs with WHISP_BENCH_LARGE=1
+STATS_SCALES = (1, 10, 100) if os.getenv("WHISP_BENCH_LARGE") == "1" else (1, 10)
+MAX_PER_FEATURE_GROWTH = 1.5
+
+# Rows of the frame whisp_risk runs on in test_risk_large_frame_performance
+RISK_LARGE_ROWS = 10000
+
+# Copies of the example stats fed to whisp_risk in test_risk_scaling_performance
+RISK_SCALES = (1, 10, 100, 1000)
+
+# Set WHISP_BENCH_DUMP to a file path to write the full-workflow results there as NDJSON
+BENCH_DUMP_PATH = os.getenv("WHISP_BENCH_DUMP")
+
+# Optional ceiling (MB) on peak RSS growth in test_full_workflow_memory, for CI gating
+MAX_RSS_GROWTH_MB = float(os.getenv("WHISP_BENCH_MAX_RSS_MB", "0")) or None
+
+
+def time_function(func, *args, repeat=None, **kwargs):
+    """
+    Helper to time a function execution.
+
+    Runs func `repeat` times (default WHISP_BENCH_REPEAT) with perf_counter_ns
+    and returns (last result, best time in seconds, {min, median, stdev}).
+    """
+    repeat = repeat or BENCH_REPEAT
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        result = func(*args, **kwargs)
+        t1 = time.perf_counter_ns()
+        times.append((t1 - t0) / 1e9)
+
+    stats = {
+        'min': min(times),
+        'median': statistics.median(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+    return result, stats['min'], stats
+
+
+def format_timing(stats, scale=1, unit="seconds"):
+    """Format timing stats as median ± stdev."""
+    return (f"{stats['median']*scale:.2f} ± {stats['stdev']*scale:.2f} {unit} "
+            f"(min {stats['min']*scale:.2f})")
+
+
+def _git_sha():
+    """Current commit of the repository, or None if it cannot be determined."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _load_bench_cache():
+    """Load persisted benchmark timings ({} if missing or unreadable)."""
+    try:
+        with open(BENCH_CACHE_PATH, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
+def _save_bench_cache(cache):
+    """Persist benchmark timings."""
+    BENCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(BENCH_CACHE_PATH, "wb") as f:
+        pickle.dump(cache, f)
+
+
+@lru_cache(maxsize=4)
+def _cached_combine(validate_bands):
+    """
+    Time combine_datasets(validate_bands) at most once per process.
+
+    The slow validate_bands=True timing is also persisted per git commit and
+    reused on later runs unless FORCE_BENCH is set. Returns (best time, stats).
+    """
+    key = (_git_sha(), validate_bands)
+    if validate_bands and key[0] and not FORCE_BENCH:
+        cached = _load_bench_cache().get(key)
+        if cached is not None:
+            print(f"   💾 Reusing timing measured earlier for commit {key[0][:8]}")
+            return cached
+
+    _, best, stats = time_function(combine_datasets, validate_bands=validate_bands)
+
+    if validate_bands and key[0]:
+        cache = _load_bench_cache()
+        cache[key] = (best, stats)
+        _save_bench_cache(cache)
 
-def time_function(func, *args, **kwargs):
-    """Helper to time a function execution."""
-    start = time.time()
+    return best, stats
+
+
+# Most .getInfo() calls allowed per call of each benchmarked step. The stats
+# step downloads its results with computeFeatures, not .getInfo().
+MAX_GETINFO = {
+    'combine_no_validation': 0,
+    'combine_with_validation': 1,
+    'workflow_stats': 0,
+}
+
+# Running total of ee.ComputedObject.getInfo calls (reset per test by getinfo_counter),
+# and the per-call counts measured by each benchmark, for the summary report
+_getinfo_calls = {'n': 0}
+GETINFO_LOG = {}
+
+
+def _counting_getinfo(get_info):
+    """Wrap ee.ComputedObject.getInfo so each call bumps _getinfo_calls."""
+    def wrapper(self, *args, **kwargs):
+        _getinfo_calls['n'] += 1
+        return get_info(self, *args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture(autouse=True)
+def getinfo_counter(monkeypatch):
+    """Count .getInfo() calls made during each test (Image, Collection etc. all end up here)."""
+    _getinfo_calls['n'] = 0
+    monkeypatch.setattr(ee.ComputedObject, "getInfo", _counting_getinfo(ee.ComputedObject.getInfo))
+    yield _getinfo_calls
+
+
+def _check_getinfo(name, func, *args, **kwargs):
+    """Call func once and check its .getInfo() calls with _assert_getinfo."""
+    start = _getinfo_calls['n']
     result = func(*args, **kwargs)
-    elapsed = time.time() - start
-    return result, elapsed
+    _assert_getinfo(name, _getinfo_calls['n'] - start)
+    return result
+
+
+def _assert_getinfo(name, calls):
+    """Log the .getInfo() calls of one call of a step and assert they stay within MAX_GETINFO[name]."""
+    GETINFO_LOG[name] = calls
+    print(f"   ✓ .getInfo() calls ({name}): {calls}")
+    assert calls <= MAX_GETINFO[name], \
+        f"{name} made {calls} .getInfo() calls (max {MAX_GETINFO[name]})"
 
 
-def test_combine_datasets_performance():
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+@pytest.mark.skipif(pytest_benchmark is None, reason="pytest-benchmark is not installed")
+@pytest.mark.benchmark(group="combine_datasets", min_rounds=5, warmup=True)
+@pytest.mark.parametrize("validate_bands", [False, True], ids=["no_validation", "with_validation"])
+def test_combine_datasets_benchmark(benchmark, validate_bands):
     """
-    Test performance of combine_datasets without validation.
+    Benchmark combine_datasets with and without band validation.
+
+    validate_bands=False (default) should be much faster since it skips the
+    .getInfo() call; compare the two cases in the combine_datasets group.
+    """
+    benchmark(combine_datasets, validate_bands=validate_bands)
+
+    name = 'combine_with_validation' if validate_bands else 'combine_no_validation'
+    _check_getinfo(name, combine_datasets, validate_bands=validate_bands)
+
+
+def combine_datasets_performance():
+    """
+    Time combine_datasets without validation (script mode summary).
 
     OPTIMIZATION: validate_bands=False (default) should be much faster
     than validate_bands=True since it skips the .getInfo() call.
@@ -60,15 +271,22 @@ def test_combine_datasets_performance():
     print("BENCHMARK: combine_datasets() performance")
     print("="*80)
 
+    # Both variants run concurrently; each is timed inside its own thread, so
+    # the wall time is that of the slow (getInfo-bound) one
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_no_validation = executor.submit(_cached_combine, False)
+        future_with_validation = executor.submit(_cached_combine, True)
+        time_no_validation, stats_no_validation = future_no_validation.result()
+        time_with_validation, stats_with_validation = future_with_validation.result()
+
     # Test without validation (optimized - default)
-    print("\n1. Testing combine_datasets(validate_bands=False) [OPTIMIZED]...")
-    _, time_no_validation = time_function(combine_datasets, validate_bands=False)
-    print(f"   ✓ Time taken: {time_no_validation:.2f} seconds")
+    print("\n1. combine_datasets(validate_bands=False) [OPTIMIZED]")
+    _check_getinfo('combine_no_validation', combine_datasets, validate_bands=False)
+    print(f"   ✓ Time taken: {format_timing(stats_no_validation)}")
 
     # Test with validation (slow - for comparison only)
-    print("\n2. Testing combine_datasets(validate_bands=True) [SLOW - OLD BEHAVIOR]...")
-    _, time_with_validation = time_function(combine_datasets, validate_bands=True)
-    print(f"   ✓ Time taken: {time_with_validation:.2f} seconds")
+    print("\n2. combine_datasets(validate_bands=True) [SLOW - OLD BEHAVIOR]")
+    print(f"   ✓ Time taken: {format_timing(stats_with_validation)}")
 
     # Calculate speedup
     if time_with_validation > 0:
@@ -85,6 +303,70 @@ def test_combine_datasets_performance():
     return time_no_validation, time_with_validation
 
 
+def _init_ee_highvolume():
+    """Initialize EE on the high-volume endpoint with PROJECT from .env (also the Pool initializer)."""
+    load_dotenv(env_path)
+    project = os.getenv("PROJECT")
+    if project:
+        ee.Initialize(project=project, opt_url=EE_HIGH_VOLUME_URL)
+    else:
+        ee.Initialize(opt_url=EE_HIGH_VOLUME_URL)
+    return project
+
+
+def _init_ee_session():
+    """Initialize EE for a benchmark run, warning instead of failing if it can't."""
+    try:
+        project = _init_ee_highvolume()
+        if project:
+            print(f"✓ Earth Engine initialized successfully with project: {project}")
+        else:
+            print("✓ Earth Engine initialized successfully")
+    except Exception as e:
+        print(f"⚠ Warning: Could not initialize Earth Engine: {e}")
+        print("  Make sure you've run: earthengine authenticate")
+        print("  And set PROJECT in your .env file")
+
+
+@pytest.fixture(scope="session")
+def ee_session():
+    """Initialize Earth Engine once per session, only for tests that hit EE."""
+    if not RUN_INTEGRATION:
+        pytest.skip("Earth Engine integration test; set WHISP_RUN_INTEGRATION=1 to run")
+    _init_ee_session()
+    yield
+
+
+def _chunks(gdf, size):
+    """Split a GeoDataFrame into consecutive pieces of at most size rows."""
+    return [gdf.iloc[i:i + size] for i in range(0, len(gdf), size)]
+
+
+def _parallel_stats(gdf, pool, n_workers=STATS_WORKERS):
+    """
+    Run the stats step on n_workers chunks of gdf concurrently in pool.
+
+    The pool is created by the caller, so process start-up and the EE
+    initialization in each worker stay out of the timed call. Every chunk
+    numbers its plots from 1, so plotId is renumbered over the combined
+    result to match a serial run.
+    """
+    size = max(1, -(-len(gdf) // n_workers))
+    df = pd.concat(pool.map(whisp_formatted_stats_gdf_to_df, _chunks(gdf, size)), ignore_index=True)
+    df[plot_id_column] = pd.Series(range(1, len(df) + 1)).astype(df[plot_id_column].dtype)
+    return df
+
+
+def _dump_ndjson(df, path):
+    """Write a DataFrame as newline-delimited JSON, one orjson-encoded record per line."""
+    with open(path, "wb") as f:
+        for rec in df.to_dict(orient="records"):
+            f.write(orjson.dumps(rec, default=str, option=orjson.OPT_SERIALIZE_NUMPY))
+            f.write(b"\n")
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
 def test_full_workflow_performance():
     """
     Test performance of the complete workflow.
@@ -97,19 +379,48 @@ def test_full_workflow_performance():
     print("="*80)
     print(f"\nInput file: {GEOJSON_EXAMPLE_FILEPATH.name}")
 
+    if BENCH_DUMP_PATH and orjson is None:
+        pytest.skip("orjson is not installed (needed for WHISP_BENCH_DUMP)")
+
+    # Load the fixture once, outside the timed block, so file I/O isn't counted as stats time
+    start = time.perf_counter()
+    gdf = pyogrio.read_dataframe(GEOJSON_EXAMPLE_FILEPATH)
+    print(f"\n0. Fixture loaded in {(time.perf_counter() - start) * 1000:.1f} ms (not timed below)")
+
     # Time the statistics calculation
-    print("\n1. Calculating statistics from GeoJSON...")
-    df_stats, stats_time = time_function(
-        whisp_formatted_stats_geojson_to_df,
-        GEOJSON_EXAMPLE_FILEPATH
-    )
-    print(f"   ✓ Time taken: {stats_time:.2f} seconds")
+    print("\n1. Calculating statistics from GeoDataFrame...")
+    # getInfo calls of each timed run; the busiest one is checked against MAX_GETINFO
+    stats_getinfo = []
+
+    def counted_stats(gdf):
+        before = _getinfo_calls['n']
+        df = whisp_formatted_stats_gdf_to_df(gdf)
+        stats_getinfo.append(_getinfo_calls['n'] - before)
+        return df
+
+    df_stats, stats_time, stats_timing = time_function(counted_stats, gdf)
+    print(f"   ✓ Time taken: {format_timing(stats_timing)}")
     print(f"   ✓ Features processed: {len(df_stats)}")
+    _assert_getinfo('workflow_stats', max(stats_getinfo))
+
+    # Same step split across worker processes, for comparison only
+    print(f"\n1b. Calculating statistics in parallel ({STATS_WORKERS} workers)...")
+    with multiprocessing.Pool(STATS_WORKERS, initializer=_init_ee_highvolume) as pool:
+        df_parallel, parallel_time, parallel_timing = time_function(_parallel_stats, gdf, pool)
+    print(f"   ✓ Time taken: {format_timing(parallel_timing)}")
+    print(f"   ✓ Speedup vs serial: {stats_time / parallel_time:.2f}x")
+    assert len(df_parallel) == len(df_stats), "Parallel run should return every feature"
 
     # Time the risk assessment
     print("\n2. Calculating risk assessment...")
-    df_with_risk, risk_time = time_function(whisp_risk, df_stats)
-    print(f"   ✓ Time taken: {risk_time:.2f} seconds")
+    df_with_risk, risk_time, risk_timing = time_function(whisp_risk, df_stats)
+    print(f"   ✓ Time taken: {format_timing(risk_timing)}")
+
+    # Just the construction step inside whisp_risk: adding the three
+    # precomputed risk arrays to the stats frame in one assign
+    risk_arrays = {col: df_with_risk[col].to_numpy() for col in ("risk_pcrop", "risk_acrop", "risk_timber")}
+    _, _, assign_timing = time_function(df_stats.assign, **risk_arrays)
+    print(f"   ✓ Risk column construction: {format_timing(assign_timing, 1e6, 'µs')}")
 
     # Total time
     total_time = stats_time + risk_time
@@ -117,43 +428,318 @@ def test_full_workflow_performance():
 
     # Verify results
     assert isinstance(df_with_risk, pd.DataFrame), "Result should be a DataFrame"
-    assert len(df_with_risk) == 36, "Should have 36 features"
+    assert len(df_with_risk) == len(gdf), "Should have one row per input feature"
     assert "risk_pcrop" in df_with_risk.columns, "Should have risk_pcrop column"
     assert "risk_acrop" in df_with_risk.columns, "Should have risk_acrop column"
     assert "risk_timber" in df_with_risk.columns, "Should have risk_timber column"
 
     print("\n   ✅ All assertions passed!")
 
+    # Outside the timed blocks, so dumping never inflates the reported times
+    if BENCH_DUMP_PATH:
+        _dump_ndjson(df_with_risk, BENCH_DUMP_PATH)
+        print(f"   ✓ Results written to {BENCH_DUMP_PATH}")
+
     return total_time, df_with_risk
 
 
+# ee.data calls that each cost one round trip: computeValue backs every
+# .getInfo(), computeFeatures backs convert_ee_to_df's DataFrame download
+EE_COMPUTE_CALLS = ("computeValue", "computeFeatures")
+
+
+@contextmanager
+def _count_ee_round_trips():
+    """Count EE_COMPUTE_CALLS made inside the block."""
+    calls = []
+    originals = {name: getattr(ee.data, name) for name in EE_COMPUTE_CALLS}
+
+    def counting(name, func):
+        def wrapper(*args, **kwargs):
+            calls.append(name)
+            return func(*args, **kwargs)
+        return wrapper
+
+    for name, func in originals.items():
+        setattr(ee.data, name, counting(name, func))
+    try:
+        yield calls
+    finally:
+        for name, func in originals.items():
+            setattr(ee.data, name, func)
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+def test_stats_round_trips():
+    """
+    Test that the stats step stays a single deferred EE computation.
+
+    Per-feature reductions are mapped server side and fetched with one
+    terminal computeFeatures download; a .getInfo() reintroduced in a per-feature loop
+    would turn that into one round trip per feature and fail here.
+    """
+    gdf = pyogrio.read_dataframe(GEOJSON_EXAMPLE_FILEPATH)
+
+    with _count_ee_round_trips() as calls:
+        df_stats = whisp_formatted_stats_gdf_to_df(gdf)
+
+    print(f"\n   ✓ EE round trips for {len(df_stats)} features: {len(calls)}")
+    assert len(calls) <= MAX_STATS_ROUND_TRIPS, \
+        f"Stats made {len(calls)} EE round trips (max {MAX_STATS_ROUND_TRIPS})"
+
+    return len(calls)
+
+
+def _stats_cache_path(path):
+    """
+    Disk cache location for the stats of a GeoJSON file.
+
+    Keyed by the file bytes and the serialized combine_datasets() graph (built
+    client side, no round trip), so editing the fixture or any dataset
+    definition gives a new entry.
+    """
+    key = hashlib.blake2b(
+        Path(path).read_bytes() + combine_datasets().serialize().encode(),
+        digest_size=16
+    ).hexdigest()
+    return BENCH_CACHE_PATH.parent / f"stats-{key}.pkl"
+
+
+def _cached_stats(path, refresh=None):
+    """
+    Whisp stats for a GeoJSON file, reused from disk across runs when inputs are unchanged.
+
+    refresh (default FORCE_BENCH) recomputes and overwrites the cached entry.
+    """
+    refresh = FORCE_BENCH if refresh is None else refresh
+    cache_path = _stats_cache_path(path)
+    if cache_path.exists() and not refresh:
+        return pd.read_pickle(cache_path)
+
+    df_stats = whisp_formatted_stats_gdf_to_df(pyogrio.read_dataframe(path))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    df_stats.to_pickle(cache_path)
+    return df_stats
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+def test_stats_disk_cache():
+    """
+    Test the on-disk stats cache: a cold run computes and stores, a warm run only reads.
+    """
+    print("\n" + "="*80)
+    print("BENCHMARK: Stats disk cache (cold vs warm)")
+    print("="*80)
+
+    df_cold, cold_time, _ = time_function(_cached_stats, GEOJSON_EXAMPLE_FILEPATH, refresh=True, repeat=1)
+    df_warm, warm_time, warm_timing = time_function(_cached_stats, GEOJSON_EXAMPLE_FILEPATH, refresh=False)
+
+    print(f"\n   ✓ Cold (compute + store): {cold_time:.2f} seconds")
+    print(f"   ✓ Warm (read from disk):  {format_timing(warm_timing, 1000, 'ms')}")
+
+    assert df_warm.equals(df_cold), "Cached stats should match the computed ones"
+    assert warm_time < cold_time, "Reading the cache should beat recomputing"
+
+    return cold_time, warm_time
+
+
+# Time per feature of each test_stats_scaling_performance case, keyed by copies
+_stats_per_feature = {}
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+@pytest.mark.parametrize("n_repeat", STATS_SCALES)
+def test_stats_scaling_performance(n_repeat):
+    """
+    Test how the stats step scales with the number of input features.
+
+    The fixture features are repeated n_repeat times in memory (36, 360 and,
+    with WHISP_BENCH_LARGE=1, 3600 features). Time per feature at the largest size may be at most
+    MAX_PER_FEATURE_GROWTH times that at 1 copy, which catches slowdowns that
+    only appear at scale.
+    """
+    gdf = pyogrio.read_dataframe(GEOJSON_EXAMPLE_FILEPATH)
+    gdf_n = gpd.GeoDataFrame(pd.concat([gdf] * n_repeat, ignore_index=True), crs=gdf.crs)
+
+    # Large inputs take minutes, so each size is timed once
+    df_stats, elapsed, _ = time_function(whisp_formatted_stats_gdf_to_df, gdf_n, repeat=1)
+    per_feature = elapsed / len(gdf_n)
+    _stats_per_feature[n_repeat] = per_feature
+    print(f"\n   ✓ n_repeat={n_repeat} ({len(gdf_n)} features): {elapsed:.2f} s, "
+          f"{per_feature*1000:.1f} ms/feature")
+
+    assert len(df_stats) == len(gdf_n), "Should have one row per input feature"
+    if n_repeat == max(STATS_SCALES) and min(STATS_SCALES) in _stats_per_feature:
+        baseline = _stats_per_feature[min(STATS_SCALES)]
+        assert per_feature <= MAX_PER_FEATURE_GROWTH * baseline, \
+            f"Time per feature grew {per_feature / baseline:.2f}x from 1 to {n_repeat} copies"
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+def test_risk_scaling_performance():
+    """
+    Test how whisp_risk scales with the number of rows.
+
+    The example stats (from the disk cache when inputs are unchanged) are
+    repeated N times (RISK_SCALES).
+    Time per feature should stay roughly flat; a rise with N points to
+    per-row Python work or O(n²) behaviour in the risk calculation.
+    """
+    print("\n" + "="*80)
+    print("BENCHMARK: Risk assessment scaling")
+    print("="*80)
+
+    df_stats = _cached_stats(GEOJSON_EXAMPLE_FILEPATH)
+
+    per_feature = {}
+    for n in RISK_SCALES:
+        df_n = pd.concat([df_stats] * n, ignore_index=True)
+        df_with_risk, risk_time, _ = time_function(whisp_risk, df_n)
+        per_feature[n] = risk_time / len(df_n)
+        print(f"   N={n:<5} rows={len(df_n):<6} {risk_time:.3f} s  "
+              f"({per_feature[n]*1e6:.1f} µs/feature)")
+
+        assert len(df_with_risk) == len(df_n), "Should keep one row per input feature"
+
+    return per_feature
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+def test_risk_large_frame_performance():
+    """
+    Test whisp_risk on a RISK_LARGE_ROWS-row frame built from the example stats.
+
+    With the default indicator columns precomputed at import, the time is
+    the risk calculation itself rather than lookup-table filtering per call.
+    """
+    print("\n" + "="*80)
+    print(f"BENCHMARK: Risk assessment on {RISK_LARGE_ROWS} rows")
+    print("="*80)
+
+    df_stats = _cached_stats(GEOJSON_EXAMPLE_FILEPATH)
+    copies = -(-RISK_LARGE_ROWS // len(df_stats))
+    df_large = pd.concat([df_stats] * copies, ignore_index=True).iloc[:RISK_LARGE_ROWS]
+
+    df_with_risk, risk_time, risk_timing = time_function(whisp_risk, df_large)
+    print(f"\n   ✓ Time taken: {format_timing(risk_timing)}")
+    print(f"   ✓ Per feature: {risk_time / RISK_LARGE_ROWS * 1e6:.1f} µs")
+
+    assert len(df_with_risk) == RISK_LARGE_ROWS, "Should keep one row per input feature"
+
+    return risk_time
+
+
+def _read_features_chunked(path, chunk_size=1000):
+    """
+    Stream a GeoJSON FeatureCollection into a GeoDataFrame, chunk_size features at a time.
+
+    Features are parsed incrementally with ijson, so peak memory grows with
+    chunk_size rather than with the number of features in the file.
+    """
+    chunks = []
+    buf = []
+    with open(path, "rb") as f:
+        for feature in ijson.items(f, "features.item", use_float=True):
+            buf.append(feature)
+            if len(buf) >= chunk_size:
+                chunks.append(gpd.GeoDataFrame.from_features(buf, crs="EPSG:4326"))
+                buf = []
+    if buf:
+        chunks.append(gpd.GeoDataFrame.from_features(buf, crs="EPSG:4326"))
+    return gpd.GeoDataFrame(pd.concat(chunks, ignore_index=True), crs="EPSG:4326")
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@pytest.mark.skipif(ijson is None, reason="ijson is not installed")
+@pytest.mark.integration
+@pytest.mark.usefixtures("ee_session")
+def test_full_workflow_memory():
+    """
+    Test peak memory of the complete workflow.
+
+    Same pipeline as test_full_workflow_performance, but the fixture is
+    streamed with _read_features_chunked and the growth in peak RSS is
+    reported. Set WHISP_BENCH_MAX_RSS_MB to fail when it exceeds a budget.
+    """
+    print("\n" + "="*80)
+    print("BENCHMARK: Full workflow memory (streamed GeoJSON → Stats → Risk)")
+    print("="*80)
+
+    rss_before = _peak_rss_mb()
+    gdf = _read_features_chunked(GEOJSON_EXAMPLE_FILEPATH)
+    df_with_risk = whisp_risk(whisp_formatted_stats_gdf_to_df(gdf))
+    rss_growth = _peak_rss_mb() - rss_before
+
+    print(f"\n   ✓ Features processed: {len(df_with_risk)}")
+    print(f"   ✓ Peak RSS growth: {rss_growth:.1f} MB")
+
+    assert len(df_with_risk) == len(gdf), "Should have one row per input feature"
+    if MAX_RSS_GROWTH_MB is not None:
+        assert rss_growth <= MAX_RSS_GROWTH_MB, \
+            f"Peak RSS grew by {rss_growth:.1f} MB (budget {MAX_RSS_GROWTH_MB:.1f} MB)"
+
+    print("\n   ✅ All assertions passed!")
+
+    return rss_growth
+
+
+COLD_IMPORT_SCRIPT = (
+    "import time; t = time.perf_counter(); "
+    "from openforis_whisp.datasets import CURRENT_YEAR; "
+    "print(time.perf_counter() - t)"
+)
+
+
 def test_module_import_performance():
     """
     Test that module-level constants are calculated quickly.
 
     OPTIMIZATION: CURRENT_YEAR and CURRENT_YEAR_2DIGIT should be
     pre-calculated at import time.
+
+    Two separate measurements: a cold import in a fresh interpreter (reported
+    only, it is dominated by ee/pandas imports) and a warm attribute lookup on
+    the already loaded module (asserted, it proves the constants are ready).
     """
     print("\n" + "="*80)
     print("BENCHMARK: Module import and constants")
     print("="*80)
 
-    start = time.time()
-    from openforis_whisp.datasets import CURRENT_YEAR, CURRENT_YEAR_2DIGIT
-    elapsed = time.time() - start
+    # Cold import, in a fresh interpreter so nothing is cached
+    proc = subprocess.run([sys.executable, "-c", COLD_IMPORT_SCRIPT], capture_output=True, text=True)
+    try:
+        cold_time = float(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        cold_time = float("nan")
+        print(f"\n   ⚠ Cold import failed: {proc.stderr.strip()}")
+
+    # Warm lookup, on the module imported at the top of this file
+    import openforis_whisp.datasets as datasets_module
+    CURRENT_YEAR, lookup_time, _ = time_function(getattr, datasets_module, "CURRENT_YEAR")
+    CURRENT_YEAR_2DIGIT = datasets_module.CURRENT_YEAR_2DIGIT
 
     print(f"\n   ✓ CURRENT_YEAR: {CURRENT_YEAR}")
     print(f"   ✓ CURRENT_YEAR_2DIGIT: {CURRENT_YEAR_2DIGIT}")
-    print(f"   ✓ Import time: {elapsed*1000:.2f} milliseconds")
+    print(f"   ✓ Cold import time: {cold_time*1000:.2f} milliseconds")
+    print(f"   ✓ Warm lookup time: {lookup_time*1e6:.2f} microseconds")
 
-    # Should be nearly instant
-    assert elapsed < 0.1, "Module import should be very fast"
+    # Constants should already be computed
+    assert lookup_time < 1e-4, "Constant lookup should take under 100 microseconds"
     assert CURRENT_YEAR >= 2025, "Should have current year"
     assert CURRENT_YEAR_2DIGIT == CURRENT_YEAR % 100, "2-digit year should be correct"
 
     print("\n   ✅ Module constants validated!")
 
-    return elapsed
+    return cold_time
 
 
 def run_all_benchmarks():
@@ -165,38 +751,58 @@ def run_all_benchmarks():
 
     # Run all benchmarks
     import_time = test_module_import_performance()
-    combine_no_val, combine_with_val = test_combine_datasets_performance()
+    combine_no_val, combine_with_val = combine_datasets_performance()
     workflow_time, df_result = test_full_workflow_performance()
 
-    # Generate summary report
-    print("\n" + "="*80)
-    print("SUMMARY REPORT")
-    print("="*80)
-
-    print("\n📊 Performance Metrics:")
-    print(f"   1. Module import:              {import_time*1000:.2f} ms")
-    print(f"   2. combine_datasets (optimized): {combine_no_val:.2f} s")
-    print(f"   3. combine_datasets (old way):   {combine_with_val:.2f} s")
-    print(f"   4. Full workflow:                {workflow_time:.2f} s")
-
     combine_speedup = combine_with_val - combine_no_val
-    print(f"\n⚡ Key Optimization Impact:")
-    print(f"   - combine_datasets speedup: {combine_speedup:.2f}s faster ({(combine_speedup/combine_with_val)*100:.1f}% improvement)")
-
-    print("\n✅ All benchmarks completed successfully!")
-    print(f"✅ Processed {len(df_result)} features with risk assessment")
 
-    return {
+    # Generate summary report, printed once as a table
+    summary = pd.DataFrame([
+        {'metric': 'Module import (cold)', 'seconds': import_time},
+        {'metric': 'combine_datasets (optimized)', 'seconds': combine_no_val,
+         'getinfo_calls': GETINFO_LOG.get('combine_no_validation')},
+        {'metric': 'combine_datasets (old way)', 'seconds': combine_with_val},
+        {'metric': 'combine_datasets speedup', 'seconds': combine_speedup},
+        {'metric': 'Full workflow', 'seconds': workflow_time,
+         'getinfo_calls': GETINFO_LOG.get('workflow_stats')},
+    ])
+    print("\n" + "="*80 + "\nSUMMARY REPORT\n" + "="*80 + "\n"
+          + summary.to_string(index=False, float_format='%.3f')
+          + "\n\n✅ All benchmarks completed successfully!"
+          + f"\n✅ Processed {len(df_result)} features with risk assessment")
+
+    results = {
         'import_time': import_time,
         'combine_no_validation': combine_no_val,
         'combine_with_validation': combine_with_val,
         'workflow_time': workflow_time,
-        'features_processed': len(df_result)
     }
+    # Counts are kept out of 'timings', which compare_bench.py treats as seconds
+    counts = {
+        'features_processed': len(df_result),
+        'getinfo_calls': dict(GETINFO_LOG),
+    }
+
+    with open(BENCH_RESULTS_PATH, "w") as f:
+        json.dump({
+            'git_sha': _git_sha(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'timings': results,
+            'counts': counts,
+        }, f, indent=2)
+    print(f"📄 Results written to {BENCH_RESULTS_PATH}")
+
+    return results
 
 
 if __name__ == "__main__":
     # Run benchmarks if executed directly
+    if "--force" in sys.argv[1:]:
+        FORCE_BENCH = True
+    _init_ee_session()
+    # No pytest fixtures here, so count .getInfo() calls for the whole run
+    ee.ComputedObject.getInfo = _counting_getinfo(ee.ComputedObject.getInfo)
     results = run_all_benchmarks()
 
     print("\n" + "="*80)